@@ -0,0 +1,177 @@
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from load_data import load_feedback_data
+from schema import apply_schema
+from nlp_engine import analyze_comments
+from bert_sentiment import warmup
+from bayesian_model import calculate_probabilities
+from spike_detector import SpikeDetector, attach_alerts
+from risk_engine import assess_risk
+from recommendation_engine import generate_recommendations
+from export_results import export_to_excel
+from result_sinks import write_result_sinks, parse_sink_names
+from config import INPUT_SHEET, OUTPUT_SHEET, print_cache_stats
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SUMMARY_FILE = os.path.join(BASE_DIR, "data", "batch_summary.csv")
+
+
+def resolve_workbooks(pattern=None, manifest=None):
+    """
+    Expands a glob pattern and/or a manifest file into a list of workbook paths.
+    The manifest lists one path per line; blank lines and lines starting with
+    '#' are skipped, and relative paths are taken from the manifest's folder.
+    """
+    paths = []
+    if pattern:
+        paths.extend(sorted(glob.glob(pattern, recursive=True)))
+    if manifest:
+        root = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    paths.append(line if os.path.isabs(line) else os.path.join(root, line))
+    # Excel lock files (~$Book.xlsm) are not workbooks
+    paths = [p for p in paths if not os.path.basename(p).startswith("~$")]
+    return list(dict.fromkeys(os.path.abspath(p) for p in paths))
+
+
+def _load_workbook(path):
+    # Worker processes only parse the saved file; no Excel instance, no model
+    return load_feedback_data(path, INPUT_SHEET, headless=True)
+
+
+def _finish_workbook(scored):
+    """Aggregate -> spikes -> risk -> recommendations for one scored workbook."""
+    detector = SpikeDetector().update_frame(scored)
+    prob_df = calculate_probabilities(scored)
+    return generate_recommendations(assess_risk(attach_alerts(prob_df, detector)))
+
+
+def run_batch(paths, workers=1, load_workers=None, export=True, summary_path=SUMMARY_FILE, sinks=None):
+    """
+    Runs the model over several workbooks in one process tree.
+
+    Workbooks are loaded in parallel by `load_workers` processes. Their
+    comments are then scored together, so identical comments across regions
+    are scored once and the model is loaded once (in this process, or once per
+    inference worker with `workers` > 1). Aggregation, risk and recommendations
+    run per workbook in the pool again; results are written back to each
+    workbook's Output sheet one at a time. The result sinks (`sinks`, default
+    from PREDICTION_MODEL_RESULT_SINKS) get all workbooks' results in one
+    write, with the workbook in 'source_workbook'.
+
+    Returns:
+        pd.DataFrame: One summary row per workbook ('Status' is 'OK' or 'Failed').
+    """
+    load_workers = max(1, min(load_workers or os.cpu_count() or 1, len(paths) or 1))
+    summary = {p: {"Workbook": p, "Status": "Failed", "Rows": 0, "Products": 0, "Error": ""} for p in paths}
+    start = time.time()
+
+    print("=" * 60)
+    print(f"BATCH RUN: {len(paths)} workbooks ({load_workers} loaders, {workers} inference workers)")
+    print("=" * 60)
+
+    with ProcessPoolExecutor(max_workers=load_workers) as pool:
+        # 1. Load every workbook in parallel
+        print("\n[1/4] Loading workbooks...")
+        frames = {}
+        futures = {p: pool.submit(_load_workbook, p) for p in paths}
+        if workers <= 1:
+            # Load the model once, here, while the pool parses workbooks
+            warmup()
+        for path, future in futures.items():
+            try:
+                df = future.result()
+                if df.empty:
+                    summary[path]["Error"] = "No data loaded"
+                    continue
+                frames[path] = df
+                summary[path]["Rows"] = len(df)
+            except Exception as e:
+                summary[path]["Error"] = str(e)
+
+        # 2. Score all comments in one deduplicated, batched pass
+        print(f"\n[2/4] Scoring {sum(len(df) for df in frames.values())} comments from {len(frames)} workbooks...")
+        scored = {}
+        if frames:
+            combined = apply_schema(pd.concat(frames.values(), ignore_index=True))
+            combined = analyze_comments(combined, workers=workers)
+            print_cache_stats()
+            offset = 0
+            for path, df in frames.items():
+                scored[path] = combined.iloc[offset:offset + len(df)].reset_index(drop=True)
+                offset += len(df)
+
+        # 3. Aggregate, risk and recommendations per workbook in parallel
+        print("\n[3/4] Aggregating and assessing risk per workbook...")
+        results = {}
+        futures = {p: pool.submit(_finish_workbook, df) for p, df in scored.items()}
+        for path, future in futures.items():
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                summary[path]["Error"] = str(e)
+
+    # 4. Write results back (Excel automation is not safe to run concurrently)
+    print("\n[4/4] Writing results...")
+    if results:
+        write_result_sinks(
+            pd.concat(results.values(), ignore_index=True), sinks, table=OUTPUT_SHEET.lower(),
+            source=[p for p, df in results.items() for _ in range(len(df))]
+        )
+    for path, final_df in results.items():
+        try:
+            if export:
+                export_to_excel(final_df, path, OUTPUT_SHEET)
+            summary[path]["Status"] = "OK"
+            summary[path]["Products"] = len(final_df)
+        except Exception as e:
+            summary[path]["Error"] = str(e)
+
+    summary_df = pd.DataFrame(list(summary.values()))
+    ok = (summary_df["Status"] == "OK").sum()
+    print("\n" + "=" * 60)
+    print(summary_df[["Workbook", "Status", "Rows", "Products", "Error"]].to_string(index=False))
+    print(f"[SUCCESS] {ok} of {len(paths)} workbooks processed in {time.time() - start:.1f}s")
+    print("=" * 60)
+
+    if summary_path:
+        try:
+            summary_df.to_csv(summary_path, index=False)
+        except Exception as e:
+            print(f"[WARNING] Could not write batch summary: {e}")
+    return summary_df
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run the model over several feedback workbooks')
+    parser.add_argument('pattern', nargs='?', default=None, help="Glob of workbooks, e.g. 'regions/*.xlsm'")
+    parser.add_argument('--manifest', default=None, help='Text file listing one workbook per line')
+    parser.add_argument('--workers', type=int, default=1, help='Number of processes for sentiment scoring')
+    parser.add_argument('--load-workers', type=int, default=None, help='Number of processes for loading/aggregating')
+    parser.add_argument('--no-export', action='store_true', help='Only print the summary, do not write workbooks')
+    parser.add_argument('--sinks', default=None, help="Also write results to these stores, comma separated: parquet,sqlite,json (data/results)")
+
+    args = parser.parse_args()
+    workbooks = resolve_workbooks(args.pattern, args.manifest)
+    if not workbooks:
+        print("[ERROR] No workbooks matched.")
+        sys.exit(1)
+
+    summary_df = run_batch(
+        workbooks, workers=args.workers, load_workers=args.load_workers, export=not args.no_export,
+        sinks=parse_sink_names(args.sinks) if args.sinks else None
+    )
+    sys.exit(0 if (summary_df["Status"] == "OK").all() else 1)
@@ -6,14 +6,19 @@ import pandas as pd
 # Add the src directory to the path so we can import modules
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from load_data import load_feedback_data
-from nlp_engine import analyze_comments
-from bayesian_model import calculate_probabilities
+from load_data import load_feedback_data, iter_feedback_chunks, load_new_rows
+from ingest_state import IngestState
+from nlp_engine import analyze_comments, ScoringPool
+from bayesian_model import calculate_probabilities, score_probabilities, SegmentAggregator
+from spike_detector import SpikeDetector, attach_alerts
 from risk_engine import assess_risk
 from recommendation_engine import generate_recommendations
-from export_results import export_to_excel
+from export_results import open_export_session
+from result_sinks import write_result_sinks, parse_sink_names
 from feedback_loop import log_result
+from trend_engine import apply_trends
 from evaluate_model import load_and_evaluate
+from config import INPUT_SHEET, OUTPUT_SHEET, SEGMENT_SHEET, print_cache_stats, print_memory_report
 
 # ========================================
 # CENTRALIZED EXCEL CONFIGURATION
@@ -21,52 +26,120 @@ from evaluate_model import load_and_evaluate
 # Use relative path for portability
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 EXCEL_FILE_PATH = os.path.join(BASE_DIR, "data", "Feedback_Dashboard_Template.xlsm")
-INPUT_SHEET = "Feedback_Data"
-OUTPUT_SHEET = "Output"
 
 
-def run_model(excel_path=EXCEL_FILE_PATH):
+def run_model(excel_path=EXCEL_FILE_PATH, workers=1, chunksize=None, by_subtype=False, time_bucket=None,
+              incremental=False, show_memory=False, sinks=None):
     """
     Main model pipeline that reads from Feedback_Data and writes to Output.
+    `workers` > 1 scores sentiment across a process pool.
+    `chunksize` streams the saved file in chunks and keeps only per-product
+    aggregates in memory (for sheets too large to load at once).
+    `by_subtype` / `time_bucket` ('h', 'D', 'W', 'M', ...) additionally write risk per
+    Product x Feedback Type x Period segment to Segment_Output.
+    `incremental` only scores rows appended since the last incremental run and
+    folds them into the saved aggregates; an edit to an earlier row rebuilds them.
+    `show_memory` prints the bytes per column of the scored rows.
+    `sinks` ('parquet', 'sqlite', 'json'; default from PREDICTION_MODEL_RESULT_SINKS)
+    also store the results outside the workbook.
     """
+    segment_keys = ['Product'] + (['Feedback Type'] if by_subtype else [])
+    segmented = bool(by_subtype or time_bucket)
+    aggregator = None
+    detector = SpikeDetector()
+    # One set of scoring workers for the whole run (all chunks), started on first use
+    pool = ScoringPool(workers)
     print("="*60)
     print("HYBRID ADAPTIVE AI MODEL (BERT + BAYESIAN + LEARNING)")
     print("="*60)
     print(f"Excel File: {excel_path}")
     
     try:
-        # 1. Load Data
-        print("\n[1/7] Loading data...")
-        df = load_feedback_data(excel_path, INPUT_SHEET)
-        
-        if df.empty:
-            print("[ERROR] No data loaded. Exiting.")
-            return
-        
-        print(f"[SUCCESS] Loaded {len(df)} records")
+        if incremental:
+            # 1-3. Incremental: score only the appended rows, fold into the saved aggregates
+            print("\n[1-3/8] Loading rows appended since the last run (Load -> BERT -> Aggregate)...")
+            state = IngestState.load(excel_path, INPUT_SHEET, segment_keys, time_bucket)
+            new_rows, full_reload, watermark = load_new_rows(excel_path, state.watermark)
+            if full_reload:
+                # Earlier rows changed (or first run): rebuild aggregates and spike tests from every row
+                state.aggregator = SegmentAggregator(segment_keys, time_bucket)
+                state.detector = SpikeDetector()
+            aggregator, detector = state.aggregator, state.detector
+            if not new_rows.empty:
+                scored = analyze_comments(new_rows, pool=pool)
+                aggregator.add_rows(scored)
+                detector.update_frame(scored)
+            print_cache_stats()
+            # Advanced only now, so rows that failed to score are read again next run
+            state.watermark = watermark
+            state.save()
+            
+            prob_df = score_probabilities(aggregator)
+            if prob_df.empty:
+                print("[ERROR] No data loaded. Exiting.")
+                return
+            print(f"[SUCCESS] Probability scores computed for {len(prob_df)} feedback types")
+        elif chunksize:
+            # 1-3. Streaming: load, score and aggregate one chunk at a time
+            print(f"\n[1-3/8] Streaming data in chunks of {chunksize} (Load -> BERT -> Aggregate)...")
+            aggregator = SegmentAggregator(segment_keys, time_bucket)
+            for chunk in iter_feedback_chunks(excel_path, INPUT_SHEET, chunksize):
+                scored = analyze_comments(chunk, pool=pool)
+                aggregator.add_rows(scored)
+                detector.update_frame(scored)
+            print_cache_stats()
+            
+            prob_df = score_probabilities(aggregator)
+            if prob_df.empty:
+                print("[ERROR] No data loaded. Exiting.")
+                return
+            print(f"[SUCCESS] Probability scores computed for {len(prob_df)} feedback types")
+        else:
+            # 1. Load Data
+            print("\n[1/8] Loading data...")
+            df = load_feedback_data(excel_path, INPUT_SHEET)
+            
+            if df.empty:
+                print("[ERROR] No data loaded. Exiting.")
+                return
+            
+            print(f"[SUCCESS] Loaded {len(df)} records")
 
-        # 2. NLP Analysis (DistilBERT)
-        print("\n[2/7] Running NLP Analysis (BERT)...")
-        df_nlp = analyze_comments(df)
-        print(f"[SUCCESS] Sentiment analysis complete")
-        
-        # 3. Bayesian Probability Model (Adaptive Weights)
-        print("\n[3/7] Calculating Probabilities (Adaptive)...")
-        prob_df = calculate_probabilities(df_nlp)
-        print(f"[SUCCESS] Probability scores computed for {len(prob_df)} feedback types")
+            # 2. NLP Analysis (DistilBERT)
+            print("\n[2/8] Running NLP Analysis (BERT)...")
+            df_nlp = analyze_comments(df, pool=pool)
+            print(f"[SUCCESS] Sentiment analysis complete")
+            print_cache_stats()
+            if show_memory:
+                print_memory_report(df_nlp)
+            detector.update_frame(df_nlp)
+            
+            # 3. Bayesian Probability Model (Adaptive Weights)
+            print("\n[3/8] Calculating Probabilities (Adaptive)...")
+            if segmented:
+                # One pass over the rows; the product table is a rollup of the segments
+                aggregator = SegmentAggregator(segment_keys, time_bucket).add_rows(df_nlp)
+                prob_df = score_probabilities(aggregator)
+            else:
+                prob_df = calculate_probabilities(df_nlp)
+            print(f"[SUCCESS] Probability scores computed for {len(prob_df)} feedback types")
         
-        # 4. Risk Scoring
-        print("\n[4/7] Assessing Risk...")
-        risk_df = assess_risk(prob_df)
+        # 4. Risk Scoring (live sentiment spikes escalate to Critical)
+        print("\n[4/8] Assessing Risk...")
+        risk_df = assess_risk(attach_alerts(prob_df, detector))
         print(f"[SUCCESS] Risk levels assigned")
         
         # 5. Recommendation Engine
-        print("\n[5/7] Generating Recommendations...")
+        print("\n[5/8] Generating Recommendations...")
         final_df = generate_recommendations(risk_df)
         print(f"[SUCCESS] Recommendations generated")
         
         # 6. History Logging (Learning Loop)
-        print("\n[6/7] Logging to History (Feedback Loop)...")
+        print("\n[6/8] Logging to History (Feedback Loop)...")
+        # Trends first: on first use they are bootstrapped from history.csv,
+        # which must not contain this run yet
+        final_df = apply_trends(final_df)
+        print(f"[SUCCESS] Trends updated (EWMA, 1h/24h/7d)")
         for _, row in final_df.iterrows():
             log_data = {
                 "feedback_type": row.get('Feedback Type'),
@@ -80,49 +153,34 @@ def run_model(excel_path=EXCEL_FILE_PATH):
             log_result(log_data)
         print(f"[SUCCESS] {len(final_df)} records logged to history.csv")
         
-        # 7. Export Results
-        print("\n[7/7] Exporting Results...")
-        export_to_excel(final_df, excel_path, OUTPUT_SHEET)
+        segment_df = None
+        if segmented:
+            segment_df = score_probabilities(aggregator, levels=None)
+            segment_df = generate_recommendations(assess_risk(attach_alerts(segment_df, detector)))
         
-        # 8. Update Dashboard Summary (User Requested Spot)
-        print("\n[8/8] Updating Dashboard Summary...")
-        try:
-            wb = xw.apps.active.books.active
-            dashboard = wb.sheets['Dashboard']
-            
-            # Map products to their Dashboard rows
-            # Risk/Issue Range (H18-I22)
-            # Recommendation Panel (L18, L22, L26, L30, L34)
-            layout_map = {
-                "ATM": {"summary_row": 18, "rec_row": 18},
-                "App": {"summary_row": 19, "rec_row": 22},
-                "Loan Process": {"summary_row": 20, "rec_row": 26},
-                "Online Banking": {"summary_row": 21, "rec_row": 30},
-                "Service": {"summary_row": 22, "rec_row": 34}
-            }
+        # Result sinks first, so consumers get this run even if the workbook is locked
+        run_ts = pd.Timestamp.now().isoformat(timespec="seconds")
+        write_result_sinks(final_df, sinks, table=OUTPUT_SHEET.lower(), run_ts=run_ts, source=excel_path)
+        if segment_df is not None:
+            write_result_sinks(segment_df, sinks, table=SEGMENT_SHEET.lower(), run_ts=run_ts, source=excel_path)
+        
+        # 7-8. Export Results and Dashboard (one open workbook, saved once)
+        with open_export_session(excel_path) as session:
+            print("\n[7/8] Exporting Results...")
+            session.write_table(final_df, OUTPUT_SHEET)
             
-            for product, layout in layout_map.items():
-                # Filter results for this product (products are stored in Feedback Type now)
-                prod_data = final_df[final_df['Feedback Type'] == product]
-                if not prod_data.empty:
-                    row = prod_data.iloc[0]
-                    risk = row['Risk Level']
-                    top_issue = row.get('Top Issue Summary', 'General feedback')
-                    rec = row.get('Recommendation', 'Monitor situation.')
-                    
-                    # 1. Update Risk Level (Column I) - The red box area
-                    dashboard.range(f"I{layout['summary_row']}").value = f"{product}  {risk}"
-                    
-                    # 2. Update Top Issue Summary (Column H)
-                    dashboard.range(f"H{layout['summary_row']}").value = top_issue
-                    
-                    # 3. Update Detailed Recommendation (Column L)
-                    dashboard.range(f"L{layout['rec_row']}").value = rec
-                    
-            print(f"[SUCCESS] Dashboard fully updated: Risk (I18:I22), Issues (H18:H22), Recommendations (L18:L34)")
+            if segment_df is not None:
+                print(f"[INFO] Exporting Segment Rollups ({' x '.join(aggregator.keys)})...")
+                session.write_table(segment_df, SEGMENT_SHEET)
             
-        except Exception as dash_e:
-            print(f"[WARNING] Could not update Dashboard summary: {dash_e}")
+            # 8. Update Dashboard Summary (User Requested Spot)
+            print("\n[8/8] Updating Dashboard Summary...")
+            try:
+                session.update_dashboard(final_df)
+                print(f"[SUCCESS] Dashboard fully updated: Risk (I18:I22), Issues (H18:H22), Recommendations (L18:L34)")
+                
+            except Exception as dash_e:
+                print(f"[WARNING] Could not update Dashboard summary: {dash_e}")
         
         print("\n" + "="*60)
         print("[SUCCESS] MODEL RUN COMPLETE")
@@ -133,6 +191,8 @@ def run_model(excel_path=EXCEL_FILE_PATH):
         import traceback
         traceback.print_exc()
         raise
+    finally:
+        pool.close()
 
 
 @xw.sub
@@ -144,75 +204,56 @@ def run_model_from_excel():
     wb = xw.Book.caller()
     run_model(wb.fullname)
 
+def build_evaluation_frame(history_path=os.path.join(BASE_DIR, "data", "history.csv")):
+    """
+    Runs the model evaluation (MAE, MSE, R2, BIC) on history.csv.
+    Returns the 'Metric'/'Value' table for the Output side panel, or None.
+    """
+    import datetime
+    
+    # Run evaluation
+    results = load_and_evaluate(history_path)
+    
+    if not results or results.get('MAE') is None:
+         print("❌ Evaluation failed or no data available.")
+         return None
+
+    # Prepare results for Excel
+    eval_data = {
+        "Metric": ["MAE", "MSE", "R2", "BIC", "Timestamp"],
+        "Value": [
+            round(results['MAE'], 4), 
+            round(results['MSE'], 4), 
+            round(results['R2'], 4), 
+            round(results['BIC'], 4), 
+            datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ]
+    }
+    return pd.DataFrame(eval_data)
+
 @xw.sub
 def run_evaluation_from_excel():
     """
     Excel-callable function to run the model evaluation (MAE, MSE, R2, BIC).
-    Writes results back to an 'Evaluation_Results' sheet.
+    Writes results back as a side panel of the Output sheet.
     """
-    import datetime
     print("\n[EVAL] Evaluation triggered from Excel")
     
     try:
         wb = xw.Book.caller()
-        # Resolve history.csv relative to the workbook's location
         # CONSISTENT PATHING: history.csv is always in prediction_model/data/
-        history_path = os.path.join(BASE_DIR, "data", "history.csv")
-        
-        # Run evaluation
-        results = load_and_evaluate(history_path)
-        
-        if not results or results.get('MAE') is None:
-             print("❌ Evaluation failed or no data available.")
-             return
-
-        # Prepare results for Excel
-        eval_data = {
-            "Metric": ["MAE", "MSE", "R2", "BIC", "Timestamp"],
-            "Value": [
-                round(results['MAE'], 4), 
-                round(results['MSE'], 4), 
-                round(results['R2'], 4), 
-                round(results['BIC'], 4), 
-                datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            ]
-        }
-        df_eval = pd.DataFrame(eval_data)
-
-        # Write to Output sheet instead of a new sheet
-        sheet_name = OUTPUT_SHEET # Consolidate into Output
-        if sheet_name in [s.name for s in wb.sheets]:
-            sheet = wb.sheets[sheet_name]
-            # Clear old evaluation area completely to wipe formatting
-            sheet.range("I:Z").clear()
-        else:
-            sheet = wb.sheets.add(sheet_name)
-        
-        # Write metrics to a specific side-panel range (J2)
-        print(f"Writing metrics to {sheet_name} [Range J2]...")
-        sheet.range("J2").value = "--- MODEL PERFORMANCE ---"
-        sheet.range("J2").font.bold = True
-        try:
-            sheet.range("J2:K2").merge()
-            sheet.range("J2:K2").api.HorizontalAlignment = -4108 # Center
-        except:
-            pass
-            
-        sheet.range("J3").options(index=False).value = df_eval
-        
-        # Formatting for the metrics table
-        sheet.range("J3:K3").font.bold = True
-        sheet.range("J3:K3").color = (68, 114, 196) # Blue Header
-        sheet.range("J3:K3").font.color = (255, 255, 255) # White Text
-        
-        # Set column widths
-        sheet.range("I:I").column_width = 5  # Spacer
-        sheet.range("J:K").column_width = 18
+        df_eval = build_evaluation_frame()
+        if df_eval is None:
+            return
+
+        # Write to Output sheet instead of a new sheet; the results table spans A:I
+        with open_export_session(wb.fullname, "xlwings", wb=wb, save=False) as session:
+            session.write_evaluation(df_eval, OUTPUT_SHEET)
         
-        print(f"[SUCCESS] Evaluation results written as a side-panel in {sheet_name}")
+        print(f"[SUCCESS] Evaluation results written as a side-panel in {OUTPUT_SHEET}")
         
         # Optional: Bring sheet to focus
-        sheet.activate()
+        wb.sheets[OUTPUT_SHEET].activate()
 
     except Exception as e:
         error_msg = f"[ERROR] Error during Excel evaluation: {e}"
@@ -222,6 +263,16 @@ def run_evaluation_from_excel():
         except:
             pass
 
+def run_evaluation(excel_path=EXCEL_FILE_PATH):
+    """Writes the evaluation side panel to the Output sheet of `excel_path` (export backend of the run)."""
+    print("\n[EVAL] Evaluation triggered")
+    df_eval = build_evaluation_frame()
+    if df_eval is None:
+        return
+    with open_export_session(excel_path) as session:
+        session.write_evaluation(df_eval, OUTPUT_SHEET)
+    print(f"[SUCCESS] Evaluation results written as a side-panel in {OUTPUT_SHEET}")
+
 
 if __name__ == "__main__":
     import argparse
@@ -232,7 +283,82 @@ if __name__ == "__main__":
         default=EXCEL_FILE_PATH,
         help='Path to Excel file'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of processes for sentiment scoring'
+    )
+    parser.add_argument(
+        '--chunksize',
+        type=int,
+        default=None,
+        help='Stream the sheet in chunks of this many rows (large files)'
+    )
+    parser.add_argument(
+        '--by-subtype',
+        action='store_true',
+        help='Also assess risk per Product x Feedback Type (written to Segment_Output)'
+    )
+    parser.add_argument(
+        '--time-bucket',
+        default=None,
+        help="Also assess risk per Date bucket, e.g. 'h', 'D', 'W' (weeks from Monday) or 'M' (written to Segment_Output)"
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Only score rows appended since the last incremental run'
+    )
+    parser.add_argument(
+        '--memory-report',
+        action='store_true',
+        help='Print the memory used by each column of the scored rows'
+    )
+    
+    parser.add_argument(
+        '--sinks',
+        default=None,
+        help="Also write results to these stores, comma separated: parquet,sqlite,json (data/results)"
+    )
+    parser.add_argument(
+        '--evaluate',
+        action='store_true',
+        help='Write the evaluation metrics (MAE, MSE, R2, BIC) to the Output sheet instead of running the model'
+    )
+    parser.add_argument(
+        '--batch',
+        default=None,
+        help="Glob of workbooks to run in one batch, e.g. 'regions/*.xlsm' (see batch_runner.py)"
+    )
+    parser.add_argument(
+        '--manifest',
+        default=None,
+        help='Text file listing one workbook per line to run in one batch'
+    )
     
     args = parser.parse_args()
-    run_model(args.excel_path)
+    if args.evaluate:
+        run_evaluation(args.excel_path)
+        sys.exit(0)
+    
+    if args.batch or args.manifest:
+        from batch_runner import resolve_workbooks, run_batch
+        workbooks = resolve_workbooks(args.batch, args.manifest)
+        if not workbooks:
+            print("[ERROR] No workbooks matched.")
+            sys.exit(1)
+        summary_df = run_batch(workbooks, workers=args.workers, sinks=parse_sink_names(args.sinks) if args.sinks else None)
+        sys.exit(0 if (summary_df["Status"] == "OK").all() else 1)
+    
+    run_model(
+        args.excel_path,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        by_subtype=args.by_subtype,
+        time_bucket=args.time_bucket,
+        incremental=args.incremental,
+        show_memory=args.memory_report,
+        sinks=parse_sink_names(args.sinks) if args.sinks else None
+    )
 
@@ -1,22 +1,32 @@
 import os
 import sys
 import time
+import pandas as pd
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from load_data import load_feedback_data
+from load_data import load_new_rows, diff_rows
+from ingest_state import IngestState
 from nlp_engine import analyze_comments
-from bayesian_model import calculate_probabilities
+from bert_sentiment import warmup
+from bayesian_model import score_probabilities, SegmentAggregator
+from spike_detector import SpikeDetector, attach_alerts
 from risk_engine import assess_risk
 from recommendation_engine import generate_recommendations
 from export_results import export_to_excel
+from result_sinks import write_result_sinks
 
 class ExcelFileHandler(FileSystemEventHandler):
     def __init__(self, excel_path):
         self.excel_path = excel_path
         self.last_modified = time.time()
+        # Watermark, per-product aggregates and spike tests of the previous runs
+        # (also of earlier monitor sessions); later runs only apply the rows that changed
+        self.state = IngestState.load(excel_path)
+        # Scored rows seen by this session, to diff edits to earlier rows
+        self.scored = None
         
     def on_modified(self, event):
         if event.src_path.endswith('.xlsx') and event.src_path == self.excel_path:
@@ -28,21 +38,47 @@ class ExcelFileHandler(FileSystemEventHandler):
     
     def run_model(self):
         try:
-            df = load_feedback_data(self.excel_path)
-            if df.empty:
+            # Appended rows only, unless earlier rows were edited
+            df, full_reload, watermark = load_new_rows(self.excel_path, self.state.watermark)
+            if self.state.aggregator.sums.empty and df.empty:
                 print("No data loaded.")
                 return
             
-            df_nlp = analyze_comments(df)
-            prob_df = calculate_probabilities(df_nlp)
-            risk_df = assess_risk(prob_df)
+            self.update_aggregates(df, full_reload)
+            # Advanced only once the rows are aggregated; a failed run reads them again
+            self.state.watermark = watermark
+            self.state.save()
+            prob_df = score_probabilities(self.state.aggregator)
+            risk_df = assess_risk(attach_alerts(prob_df, self.state.detector))
             final_df = generate_recommendations(risk_df)
+            write_result_sinks(final_df, source=self.excel_path)
             export_to_excel(final_df, self.excel_path)
             
             print(f"✓ Model updated at {time.strftime('%H:%M:%S')}")
         except Exception as e:
             print(f"Error running model: {e}")
 
+    def update_aggregates(self, df, full_reload=True):
+        if full_reload and self.scored is None:
+            # First run, or earlier rows edited since the saved state: rebuild from the full sheet
+            self.scored = analyze_comments(df).reset_index(drop=True)
+            self.state.aggregator = SegmentAggregator().add_rows(self.scored)
+            self.state.detector = SpikeDetector().update_frame(self.scored)
+            return
+
+        if full_reload:
+            added, removed = diff_rows(self.scored, df)
+        else:
+            added, removed = df, df.iloc[0:0]
+        print(f"{len(added)} rows added, {len(removed)} rows removed since last run")
+        if not added.empty:
+            added = analyze_comments(added.copy())
+        self.state.aggregator.add_rows(added).remove_rows(removed)
+        # Only new records enter the sentiment stream
+        self.state.detector.update_frame(added)
+        if self.scored is not None:
+            self.scored = pd.concat([self.scored.drop(removed.index), added], ignore_index=True)
+
 def monitor_excel(excel_path):
     """Monitor Excel file for changes and run model automatically"""
     if not os.path.exists(excel_path):
@@ -52,6 +88,9 @@ def monitor_excel(excel_path):
     print(f"Monitoring: {excel_path}")
     print("Watching for changes... (Press Ctrl+C to stop)")
     
+    # Long-lived process: load the sentiment model once up front
+    warmup()
+    
     # Run once at start
     event_handler = ExcelFileHandler(excel_path)
     event_handler.run_model()
@@ -1,5 +1,204 @@
+import json
+import os
+import numpy as np
 import pandas as pd
+from scipy.stats import beta as beta_dist
 from learning_engine import load_weights
+from schema import widen
+from keywords import KEYWORD_PRIORS, KEYWORD_COUNT_PREFIX, TRIGGER_WORDS, keyword_counts
+
+# Persisted aggregates live in the data directory (sibling to src)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AGGREGATE_FILE = os.path.join(BASE_DIR, "data", "product_aggregates.json")
+
+# Beta(PRIOR_ALPHA, PRIOR_BETA) prior on each segment's issue probability (uniform)
+PRIOR_ALPHA = 1.0
+PRIOR_BETA = 1.0
+CREDIBLE_LEVEL = 0.95
+
+# Prior per trigger word (0 where the word has no prior), aligned with TRIGGER_WORDS
+PRIOR_VECTOR = np.array([KEYWORD_PRIORS.get(w, 0.0) for w in TRIGGER_WORDS])
+
+def bucket_start(dates, freq):
+    """
+    Start of the `freq` bucket each date falls in. Fixed frequencies ('h', 'D',
+    '15min') are floored; calendar ones ('W', 'M', 'Q') use the period start.
+
+    Args:
+        dates (pd.Series): Datetime values.
+        freq (str): Pandas frequency of the buckets.
+
+    Returns:
+        pd.Series: Bucket start per date (NaT where the date is missing).
+    """
+    try:
+        return dates.dt.floor(freq)
+    except ValueError:
+        pass
+    try:
+        return dates.dt.to_period(freq).dt.start_time
+    except ValueError as e:
+        raise ValueError(
+            f"Invalid time bucket '{freq}'. Use a pandas frequency such as 'h', 'D', 'W' or 'M'."
+        ) from e
+
+class SegmentAggregator:
+    """
+    Running aggregates (sums, counts and keyword counts) per segment.
+
+    Segments are the finest combination of `keys` (default: Product), plus a
+    'Period' bucket of the Date column when `time_bucket` is set. Coarser
+    rollups (e.g. Product only) are summed from these partials by to_frame(),
+    so every level of the cube comes out of a single pass over the rows.
+
+    Rows are added or removed as deltas, so a change to a few rows only
+    touches the affected segments, and chunks of NLP output can be folded in
+    one at a time without holding the full row-level frame in memory.
+
+    Args:
+        keys (list): Row columns to segment by, e.g. ['Product', 'Feedback Type'].
+        time_bucket (str): Pandas frequency for the Date bucket ('h', 'D', 'W', 'M'), or None.
+    """
+
+    def __init__(self, keys=('Product',), time_bucket=None):
+        if time_bucket:
+            # Fail on a bad frequency before any rows are scored
+            bucket_start(pd.Series(pd.to_datetime(['2026-01-01'])), time_bucket)
+        self.keys = list(keys) + (['Period'] if time_bucket else [])
+        self.time_bucket = time_bucket
+        self.sums = pd.DataFrame(
+            columns=['rating_sum', 'rating_count', 'sentiment_sum', 'sentiment_count'], dtype='float64'
+        )
+        self.keyword_counts = pd.DataFrame(columns=TRIGGER_WORDS, dtype='int64')
+
+    def _segments(self, df):
+        segments = pd.DataFrame({k: df[k] for k in self.keys if k != 'Period'}, index=df.index)
+        if self.time_bucket:
+            segments['Period'] = bucket_start(pd.to_datetime(df['Date'], errors='coerce'), self.time_bucket)
+        return segments
+
+    def _apply(self, df, sign):
+        segments = self._segments(df)
+        # Stored as float32; summed in float64 at the input precision
+        rating = pd.Series(widen(df['Rating']), index=df.index)
+        sentiment = pd.Series(widen(df['Sentiment Score']), index=df.index)
+        part = pd.DataFrame({
+            'rating_sum': rating.fillna(0),
+            'rating_count': rating.notna(),
+            'sentiment_sum': sentiment.fillna(0),
+            'sentiment_count': sentiment.notna()
+        }).groupby([segments[k] for k in self.keys], dropna=False, observed=True).sum().astype('float64')
+        self.sums = sign * part if self.sums.empty else self.sums.add(sign * part, fill_value=0)
+
+        if 'Keywords' in df.columns:
+            counts = sign * keyword_counts(df['Keywords'], segments)
+            if self.keyword_counts.empty:
+                self.keyword_counts = counts
+            else:
+                self.keyword_counts = self.keyword_counts.add(counts, fill_value=0).astype('int64')
+
+    def add_rows(self, df):
+        """Folds rows containing the key columns, 'Rating', 'Sentiment Score' and 'Keywords' into the totals."""
+        if not df.empty:
+            self._apply(df, 1)
+        return self
+
+    def remove_rows(self, df):
+        """
+        Subtracts previously added rows (same columns as add_rows).
+        Segments left without any rows are dropped.
+        """
+        if df.empty:
+            return self
+        self._apply(df, -1)
+
+        # Drop segments that no longer have any rows
+        alive = (self.sums['rating_count'] > 0) | (self.sums['sentiment_count'] > 0)
+        self.sums = self.sums[alive]
+        self.keyword_counts = self.keyword_counts[self.keyword_counts.index.isin(self.sums.index)]
+        return self
+
+    def to_state(self):
+        """The aggregates as a dict for json.dump(..., default=str) (see from_state)."""
+        return {
+            "keys": [k for k in self.keys if k != 'Period'],
+            "time_bucket": self.time_bucket,
+            "sums": self.sums.reset_index().to_dict(orient="records"),
+            "keyword_counts": self.keyword_counts.reset_index().to_dict(orient="records")
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuilds an aggregator from to_state() output."""
+        aggregator = cls(state["keys"], state["time_bucket"])
+
+        def restore(records, columns, dtype):
+            frame = pd.DataFrame.from_records(records, columns=aggregator.keys + columns)
+            if 'Period' in aggregator.keys:
+                frame['Period'] = pd.to_datetime(frame['Period'], errors='coerce')
+            return frame.set_index(aggregator.keys).astype(dtype)
+
+        if state["sums"]:
+            aggregator.sums = restore(state["sums"], list(aggregator.sums.columns), 'float64')
+        if state["keyword_counts"]:
+            aggregator.keyword_counts = restore(state["keyword_counts"], TRIGGER_WORDS, 'int64')
+        return aggregator
+
+    def save(self, path=AGGREGATE_FILE):
+        """Persists the aggregates as JSON."""
+        with open(path, "w") as f:
+            json.dump(self.to_state(), f, indent=2, default=str)
+
+    @classmethod
+    def load(cls, path=AGGREGATE_FILE, keys=('Product',), time_bucket=None):
+        """
+        Restores aggregates saved with save().
+        Returns an empty aggregator over `keys`/`time_bucket` if the file is missing.
+        """
+        if not os.path.exists(path):
+            return cls(keys, time_bucket)
+        with open(path, "r") as f:
+            return cls.from_state(json.load(f))
+
+    def to_frame(self, levels=None):
+        """
+        Rolls the segment partials up to `levels` (a subset of the keys; all keys by default).
+
+        Returns:
+            pd.DataFrame: One row per group with the level columns, mean 'Rating',
+            mean 'Sentiment Score', their non-missing counts, the sorted unique 'Keywords' and one
+            KEYWORD_COUNT_PREFIX column per trigger word.
+        """
+        levels = list(levels) if levels else self.keys
+        unknown = [lvl for lvl in levels if lvl not in self.keys]
+        if unknown:
+            raise ValueError(f"Unknown rollup levels {unknown}. Aggregated keys are {self.keys}.")
+
+        count_names = [KEYWORD_COUNT_PREFIX + w for w in TRIGGER_WORDS]
+        if self.sums.empty:
+            # Nothing aggregated yet: the empty frames have no key levels to group by
+            return pd.DataFrame(columns=levels + [
+                'Rating', 'Sentiment Score', 'Rating Count', 'Sentiment Count', 'Keywords'
+            ] + count_names)
+
+        sums = self.sums.groupby(level=levels, dropna=False, observed=True).sum().sort_index()
+        counts = self.keyword_counts.groupby(level=levels, dropna=False, observed=True).sum()
+        counts = counts.reindex(index=sums.index, columns=TRIGGER_WORDS, fill_value=0)
+
+        # Alphabetical keyword string per group for display
+        words = np.array(TRIGGER_WORDS, dtype=object)
+        alpha = np.argsort(words)
+        present = counts.to_numpy()[:, alpha] > 0
+        keywords = [", ".join(words[alpha][mask]) for mask in present]
+
+        frame = sums.index.to_frame(index=False)
+        frame['Rating'] = (sums['rating_sum'] / sums['rating_count']).to_numpy()
+        frame['Sentiment Score'] = (sums['sentiment_sum'] / sums['sentiment_count']).to_numpy()
+        frame['Rating Count'] = sums['rating_count'].to_numpy()
+        frame['Sentiment Count'] = sums['sentiment_count'].to_numpy()
+        frame['Keywords'] = keywords
+        count_cols = pd.DataFrame(counts.to_numpy(), columns=count_names)
+        return pd.concat([frame, count_cols], axis=1)
 
 def calculate_probabilities(df):
     """
@@ -19,66 +218,50 @@ def calculate_probabilities(df):
     
     # 1. Group by Feedback Type
     # Convert Rating to numeric just in case
-    rating_col = 'Rating'
-    df['Rating'] = pd.to_numeric(df[rating_col], errors='coerce')
-    
-    # Define aggregation
-    # Define aggregation help
-    def summarize_keywords(series):
-        # Join all text
-        all_text = ' '.join([str(k) for k in series if k])
-        # Split by comma or space
-        words = [w.strip() for w in all_text.replace(',', ' ').split() if w.strip()]
-        # Unique only
-        unique_words = sorted(list(set(words)))
-        return ", ".join(unique_words)
-
-    agg_funcs = {
-        'Rating': 'mean',
-        'Sentiment Score': 'mean',
-        'Keywords': summarize_keywords
-    }
+    df['Rating'] = pd.to_numeric(df['Rating'], errors='coerce')
+    return score_probabilities(SegmentAggregator().add_rows(df))
+
+def score_probabilities(aggregator, levels=('Product',)):
+    """
+    Computes probability scores from segment aggregates rolled up to `levels`.
+    Used directly by the streaming and segment pipelines, which fill the
+    aggregator chunk by chunk.
     
-    grouped = df.groupby('Product').agg(agg_funcs).reset_index()
+    Args:
+        aggregator (SegmentAggregator): Accumulated per-segment totals.
+        levels (list): Rollup levels; None for the finest segments.
+        
+    Returns:
+        pd.DataFrame: Aggregated DataFrame with probability scores.
+    """
+    grouped = aggregator.to_frame(levels)
+    if grouped.empty:
+        return pd.DataFrame()
     
     # Rename columns to match Risk Engine expectations
-    grouped.rename(columns={
-        'Product': 'Feedback Type',
+    renames = {
         'Rating': 'Average Rating',
         'Sentiment Score': 'Average Sentiment Score'
-    }, inplace=True)
+    }
+    # The product-level table keeps its historical 'Feedback Type' label
+    if list(levels or aggregator.keys) == ['Product']:
+        renames['Product'] = 'Feedback Type'
+    grouped.rename(columns=renames, inplace=True)
     
     # 2. Compute Probability Score
     weights = load_weights()
     print(f"Using Adaptive Weights: {weights}")
     
-    # Keyword Priors: High-impact words boost the Sentiment Prob
-    KEYWORD_PRIORS = {
-        "crash": 0.95,
-        "failed": 0.9,
-        "broken": 0.9,
-        "fraud": 0.95,
-        "down": 0.85,
-        "terrible": 0.85,
-        "error": 0.8
-    }
-
-    def boost_sentiment(row):
-        base_prob = row['Average Sentiment Score']
-        keywords = str(row.get('Keywords', '')).lower().split(', ')
-        
-        boosts = [KEYWORD_PRIORS[k] for k in keywords if k in KEYWORD_PRIORS]
-        if boosts:
-            # If high-risk keywords exist, we lean heavily towards their prior
-            return max(base_prob, max(boosts))
-        return base_prob
-
     # Normalize Rating (1-5) to 0-1 (Issue Prob)
     # 1 -> 1.0, 5 -> 0.0
     grouped['Rating Prob'] = (5 - grouped['Average Rating']) / 4
     
     # Calculate Boosted Sentiment Prob
-    grouped['Sentiment Prob'] = grouped.apply(boost_sentiment, axis=1)
+    # If high-risk keywords exist, we lean heavily towards their prior
+    present = grouped[[KEYWORD_COUNT_PREFIX + w for w in TRIGGER_WORDS]].to_numpy() > 0
+    boost = (present * PRIOR_VECTOR).max(axis=1, initial=0.0)
+    base_prob = grouped['Average Sentiment Score'].to_numpy()
+    grouped['Sentiment Prob'] = np.where(boost > 0, np.fmax(base_prob, boost), base_prob)
     
     # Combined Probability Score (Weighted Average)
     # Final = w1 * rating_prob + w2 * sentiment_prob
@@ -94,5 +277,45 @@ def calculate_probabilities(df):
     # Clip to 0-1 range just in case
     grouped['Probability Score'] = grouped['Probability Score'].clip(0, 1)
     
+    # 3. Beta posterior of the issue probability
+    # Each record is a fractional Bernoulli observation: its rating and sentiment
+    # issue probabilities, weighted like the Probability Score. Alpha/beta are
+    # therefore plain running sums, which the aggregator already keeps.
+    rating_weight = weights.get('rating_weight', 0.5)
+    sentiment_weight = weights.get('sentiment_weight', 0.5)
+    rating_n = grouped['Rating Count']
+    sentiment_n = grouped['Sentiment Count']
+    trials = rating_weight * rating_n + sentiment_weight * sentiment_n
+    successes = (
+        rating_weight * (grouped['Rating Prob'] * rating_n).fillna(0) +
+        sentiment_weight * (grouped['Average Sentiment Score'] * sentiment_n).fillna(0)
+    ).clip(0, trials)
+    grouped = pd.concat([grouped, beta_posterior(successes, trials)], axis=1)
+    
     print("Probability calculation complete.")
     return grouped
+
+def beta_posterior(successes, trials, alpha=PRIOR_ALPHA, beta=PRIOR_BETA, level=CREDIBLE_LEVEL):
+    """
+    Beta-binomial posterior of an issue probability.
+    
+    Args:
+        successes (pd.Series): (Fractional) issue observations per group.
+        trials (pd.Series): Observations per group.
+        alpha, beta (float): Beta prior parameters.
+        level (float): Mass of the central credible interval.
+        
+    Returns:
+        pd.DataFrame: 'Posterior Alpha', 'Posterior Beta', 'Posterior Mean',
+        'Credible Lower' and 'Credible Upper' per group.
+    """
+    post_alpha = alpha + successes
+    post_beta = beta + (trials - successes)
+    tail = (1 - level) / 2
+    return pd.DataFrame({
+        'Posterior Alpha': post_alpha,
+        'Posterior Beta': post_beta,
+        'Posterior Mean': post_alpha / (post_alpha + post_beta),
+        'Credible Lower': beta_dist.ppf(tail, post_alpha, post_beta),
+        'Credible Upper': beta_dist.ppf(1 - tail, post_alpha, post_beta)
+    }, index=successes.index)
@@ -1,30 +1,196 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import os
+import tempfile
+import threading
+import numpy as np
 import logging
+from sentiment_cache import get_default_cache, make_key
+from keywords import MATCHER
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+MAX_LENGTH = 128
+DEFAULT_BATCH_SIZE = 32
 
-# Global state for model availability
+# Inference backends; the active one is part of the sentiment cache key
+#   torch-fp32: reference PyTorch model
+#   torch-int8: PyTorch with dynamic int8 quantization of the Linear layers
+#   onnx:       model exported to ONNX and run through onnxruntime (CPU)
+BACKENDS = ("torch-fp32", "torch-int8", "onnx")
+REFERENCE_BACKEND = "torch-fp32"
+BACKEND = os.environ.get("PREDICTION_MODEL_SENTIMENT_BACKEND", REFERENCE_BACKEND).strip().lower()
+if BACKEND not in BACKENDS:
+    logger.warning(f"Unknown sentiment backend '{BACKEND}'. Using {REFERENCE_BACKEND}.")
+    BACKEND = REFERENCE_BACKEND
+
+# Exported ONNX models are stored in the data directory (sibling to src)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ONNX_DIR = os.path.join(BASE_DIR, "data", "onnx")
+
+# Set PREDICTION_MODEL_DISABLE_BERT=1 to run on the fallbacks only (torch is never imported)
+BERT_DISABLED = os.environ.get("PREDICTION_MODEL_DISABLE_BERT", "").strip().lower() in ("1", "true", "yes")
+
+# Global state for model availability.
+# The model is loaded lazily on first inference (or by warmup()), so importing
+# this module does not pull in torch/transformers.
 BERT_AVAILABLE = False
-tokenizer = None
-model = None
+_bert_load_attempted = False
+_bert_lock = threading.Lock()
+_predict_logits = None
+# Intra-op thread count for torch/onnxruntime; None keeps the library default
+NUM_THREADS = None
+
+def onnx_model_path(model_name=MODEL_NAME, precision="fp32"):
+    """Exported model file, keyed by model and precision so a change never loads a stale export."""
+    return os.path.join(ONNX_DIR, f"{model_name.replace('/', '--')}-{precision}.onnx")
+
+def _export_onnx(torch_model, tokenizer, path):
+    """
+    Exports the fp32 model to ONNX with dynamic batch and sequence axes.
+    The file is written under a temporary name and moved into place, so
+    concurrent workers never load a partial export.
+    """
+    import torch
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Trace a plain tuple output instead of a ModelOutput
+    torch_model.config.return_dict = False
+    dummy = tokenizer(["export"], return_tensors="pt")
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".export_", suffix=".onnx")
+    os.close(fd)
+    try:
+        torch.onnx.export(
+            torch_model,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            tmp,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"}
+            },
+            opset_version=14
+        )
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    print(f"[INFO] Exported ONNX model to {path}")
+
+def _load_backend(backend):
+    """
+    Loads the tokenizer and model for `backend`.
+
+    Returns:
+        callable: predict_logits(texts) -> np.ndarray of shape (len(texts), 2).
+    """
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
 
-# Attempt to load BERT
-print(f"Loading BERT model: {MODEL_NAME}...")
-try:
     tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+
+    if backend == "onnx":
+        import onnxruntime as ort
+
+        model_path = onnx_model_path()
+        if not os.path.exists(model_path):
+            torch_model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+            torch_model.eval()
+            _export_onnx(torch_model, tokenizer, model_path)
+            del torch_model
+
+        options = ort.SessionOptions()
+        if NUM_THREADS:
+            options.intra_op_num_threads = NUM_THREADS
+        session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+        def predict_logits(texts):
+            inputs = tokenizer(texts, return_tensors="np", truncation=True, padding=True, max_length=MAX_LENGTH)
+            feed = {
+                "input_ids": inputs["input_ids"].astype(np.int64),
+                "attention_mask": inputs["attention_mask"].astype(np.int64)
+            }
+            return session.run(["logits"], feed)[0]
+
+        return predict_logits
+
+    import torch
+
+    if NUM_THREADS:
+        torch.set_num_threads(NUM_THREADS)
     model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
     model.eval()
-    BERT_AVAILABLE = True
-    print("[SUCCESS] BERT model loaded successfully.")
-except Exception as e:
-    print(f"[WARNING] Could not load BERT model due to network/system issue: {e}")
-    print("[INFO] System will fall back to TextBlob/Heuristic mode.")
-    BERT_AVAILABLE = False
+    if backend == "torch-int8":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def predict_logits(texts):
+        inputs = tokenizer(texts, return_tensors="pt", truncation=True, padding=True, max_length=MAX_LENGTH)
+        with torch.no_grad():
+            return model(**inputs).logits.numpy()
+
+    return predict_logits
+
+def _ensure_bert_loaded():
+    """
+    Loads the active backend exactly once (thread-safe).
+    Returns True if BERT is ready for inference.
+    """
+    global BERT_AVAILABLE, _bert_load_attempted, _predict_logits
+
+    if _bert_load_attempted:
+        return BERT_AVAILABLE
+
+    with _bert_lock:
+        # Another thread may have finished loading while we waited
+        if _bert_load_attempted:
+            return BERT_AVAILABLE
+
+        if BERT_DISABLED:
+            print("[INFO] BERT disabled by PREDICTION_MODEL_DISABLE_BERT. Using TextBlob/Heuristic mode.")
+        else:
+            print(f"Loading BERT model: {MODEL_NAME} ({BACKEND})...")
+            try:
+                _predict_logits = _load_backend(BACKEND)
+                BERT_AVAILABLE = True
+                print("[SUCCESS] BERT model loaded successfully.")
+            except Exception as e:
+                print(f"[WARNING] Could not load BERT model due to network/system issue: {e}")
+                print("[INFO] System will fall back to TextBlob/Heuristic mode.")
+                BERT_AVAILABLE = False
+
+        _bert_load_attempted = True
+
+    return BERT_AVAILABLE
+
+def is_bert_available():
+    """Returns True if the BERT model is (or can be) loaded. Triggers the lazy load."""
+    return _ensure_bert_loaded()
+
+def configure_threads(num_threads):
+    """
+    Pins the intra-op thread count used by the sentiment model.
+    Must be called before the model is loaded (e.g. in a worker process initializer).
+    """
+    global NUM_THREADS
+    NUM_THREADS = max(1, int(num_threads))
+    # Also covers OpenMP/MKL pools that read the environment at import time
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(NUM_THREADS)
+
+def warmup():
+    """
+    Loads the model ahead of time and runs one dummy inference so the first
+    real request in a long-lived process does not pay the load cost.
+    
+    Returns:
+        bool: True if BERT is available, False if running on fallbacks.
+    """
+    available = _ensure_bert_loaded()
+    if available:
+        get_negative_probabilities(["warmup"], batch_size=1)
+    return available
 
 # Fallback dependencies
 try:
@@ -34,61 +200,169 @@ except ImportError:
     TEXTBLOB_AVAILABLE = False
     print("[WARNING] TextBlob also not found. Using simple keyword fallback.")
 
-def get_negative_probability(text: str) -> float:
+def _textblob_negative_probability(text):
+    analysis = TextBlob(text)
+    # Polarity: -1 (Negative) to +1 (Positive)
+    # We need Negative Probability (0 to 1)
+    # If polarity is -1, NegProb should be 1.0
+    # If polarity is +1, NegProb should be 0.0
+    # Formula: (1 - polarity) / 2
+    # Example: Polarity -0.5 -> (1 - -0.5)/2 = 0.75 (75% negative)
+    neg_prob = (1 - analysis.sentiment.polarity) / 2
+    return round(neg_prob, 4)
+
+def _keyword_negative_probability(text):
+    hits = MATCHER.find(text)
+    neg_count = len(hits["negative"])
+    pos_count = len(hits["positive"])
+    
+    if neg_count > pos_count:
+        return 0.8
+    elif pos_count > neg_count:
+        return 0.2
+    
+    return 0.5
+
+def _fallback_negative_probability(text):
+    # MODE 2: TextBlob Fallback
+    if TEXTBLOB_AVAILABLE:
+        return _textblob_negative_probability(text)
+    # MODE 3: Rudimentary Keyword Fallback
+    return _keyword_negative_probability(text)
+
+def _softmax_negative(logits):
+    # Label 0: NEGATIVE, Label 1: POSITIVE for sst-2
+    logits = np.asarray(logits, dtype=np.float64)
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp[:, 0] / exp.sum(axis=1)
+
+def _bert_negative_probabilities(texts, batch_size, predict_logits=None):
     """
-    Returns the probability (0.0 to 1.0) that the text is NEGATIVE.
+    Runs the sentiment model over `texts` in padded batches.
+    Texts are sorted by length first so each batch is only padded to its own
+    longest comment instead of MAX_LENGTH.
+    """
+    predict_logits = predict_logits or _predict_logits
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    probs = np.empty(len(texts), dtype=np.float64)
+
+    for start in range(0, len(order), batch_size):
+        batch_idx = order[start:start + batch_size]
+        probs[batch_idx] = _softmax_negative(predict_logits([texts[i] for i in batch_idx]))
+
+    return np.round(probs, 4)
+
+def check_backend_parity(texts, backend, reference=REFERENCE_BACKEND, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Scores a sample with `backend` and `reference` and reports how far the
+    negative probabilities drift apart. Bypasses the sentiment cache.
+
+    Args:
+        texts (iterable): Sample comments. Non-string or empty entries are skipped.
+        backend (str): Backend under test, one of BACKENDS.
+        reference (str): Backend to compare against (torch fp32 by default).
+        batch_size (int): Number of comments per forward pass.
+
+    Returns:
+        dict: backend, reference, samples, max_drift and mean_drift.
+    """
+    for name in (backend, reference):
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown sentiment backend '{name}'. Expected one of {BACKENDS}.")
+
+    texts = [t for t in texts if t and isinstance(t, str)]
+    if not texts:
+        raise ValueError("Parity check needs at least one non-empty comment.")
+
+    batch_size = max(1, int(batch_size))
+    ref_probs = _bert_negative_probabilities(texts, batch_size, _load_backend(reference))
+    test_probs = _bert_negative_probabilities(texts, batch_size, _load_backend(backend))
+    drift = np.abs(test_probs - ref_probs)
+
+    return {
+        "backend": backend,
+        "reference": reference,
+        "samples": len(texts),
+        "max_drift": float(drift.max()),
+        "mean_drift": float(drift.mean())
+    }
+
+def get_negative_probabilities(texts, batch_size=DEFAULT_BATCH_SIZE, use_cache=True):
+    """
+    Batched version of get_negative_probability.
     
-    Mode 1: DistilBERT (High Precision, requires Model)
-    Mode 2: TextBlob (Medium, local fallback)
-    Mode 3: Keyword (Low, emergency fallback)
+    Args:
+        texts (iterable): Comments to score. Non-string or empty entries score 0.5.
+        batch_size (int): Number of comments per forward pass.
+        use_cache (bool): Reuse BERT scores from the on-disk sentiment cache and
+            only run the model on new or edited comments.
+        
+    Returns:
+        np.ndarray: Negative probabilities in the same order as `texts`.
     """
-    if not text or not isinstance(text, str):
-        return 0.5  # neutral fallback
+    texts = list(texts)
+    probs = np.full(len(texts), 0.5, dtype=np.float64)
+    valid_idx = [i for i, t in enumerate(texts) if t and isinstance(t, str)]
+    if not valid_idx:
+        return probs
+
+    valid_texts = [texts[i] for i in valid_idx]
+    valid_probs = np.empty(len(valid_texts), dtype=np.float64)
+    pending = list(range(len(valid_texts)))
+
+    # Only BERT scores are cached; the fallbacks are cheap and would otherwise
+    # be served in place of BERT once the model becomes available again.
+    cache = get_default_cache() if (use_cache and not BERT_DISABLED) else None
+    keys = None
+    if cache is not None:
+        keys = [make_key(t, MODEL_NAME, BACKEND) for t in valid_texts]
+        cached = cache.get_many(keys)
+        pending = []
+        for j, key in enumerate(keys):
+            if key in cached:
+                valid_probs[j] = cached[key]
+            else:
+                pending.append(j)
 
     # MODE 1: BERT
-    if BERT_AVAILABLE:
+    if pending and _ensure_bert_loaded():
+        scored = None
         try:
-            inputs = tokenizer(
-                text,
-                return_tensors="pt",
-                truncation=True,
-                padding=True,
-                max_length=128
+            valid_probs[pending] = _bert_negative_probabilities(
+                [valid_texts[j] for j in pending], max(1, int(batch_size))
             )
-            with torch.no_grad():
-                outputs = model(**inputs)
-                probs = torch.softmax(outputs.logits, dim=1)
-            
-            # Label 0: NEGATIVE, Label 1: POSITIVE for sst-2
-            negative_prob = probs[0][0].item()
-            return round(negative_prob, 4)
+            scored, pending = pending, []
         except Exception as e:
-            logger.error(f"Error during BERT inference: {e}")
+            logger.error(f"Error during batched BERT inference: {e}")
             # Fall through to fallback
-            
-    # MODE 2: TextBlob Fallback
-    if TEXTBLOB_AVAILABLE:
-        analysis = TextBlob(text)
-        # Polarity: -1 (Negative) to +1 (Positive)
-        # We need Negative Probability (0 to 1)
-        # If polarity is -1, NegProb should be 1.0
-        # If polarity is +1, NegProb should be 0.0
-        # Formula: (1 - polarity) / 2
-        # Example: Polarity -0.5 -> (1 - -0.5)/2 = 0.75 (75% negative)
-        neg_prob = (1 - analysis.sentiment.polarity) / 2
-        return round(neg_prob, 4)
 
-    # MODE 3: Rudimentary Keyword Fallback
-    lower_text = text.lower()
-    neg_keywords = ["bad", "terrible", "fail", "slow", "error", "issue", "broken", "worst", "rude"]
-    pos_keywords = ["good", "great", "fast", "excellent", "love", "best", "fixed"]
-    
-    neg_count = sum(1 for w in neg_keywords if w in lower_text)
-    pos_count = sum(1 for w in pos_keywords if w in lower_text)
-    
-    if neg_count > pos_count:
-        return 0.8
-    elif pos_count > neg_count:
-        return 0.2
+        # A failing cache write (locked or full disk) must not discard the BERT scores
+        if scored and cache is not None:
+            try:
+                cache.put_many((keys[j], valid_probs[j]) for j in scored)
+            except Exception as e:
+                logger.warning(f"Could not write sentiment cache: {e}")
+
+    if pending:
+        valid_probs[pending] = [_fallback_negative_probability(valid_texts[j]) for j in pending]
+
+    probs[valid_idx] = valid_probs
+    return probs
+
+def get_cache_stats():
+    """Returns hit/miss counters of the on-disk sentiment cache, or None if it is unavailable."""
+    cache = get_default_cache()
+    return cache.stats() if cache is not None else None
+
+def get_negative_probability(text: str) -> float:
+    """
+    Returns the probability (0.0 to 1.0) that the text is NEGATIVE.
     
-    return 0.5
+    Mode 1: DistilBERT (High Precision, requires Model)
+    Mode 2: TextBlob (Medium, local fallback)
+    Mode 3: Keyword (Low, emergency fallback)
+    """
+    if not text or not isinstance(text, str):
+        return 0.5  # neutral fallback
+
+    return float(get_negative_probabilities([text], batch_size=1)[0])
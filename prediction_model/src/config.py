@@ -0,0 +1,19 @@
+from bert_sentiment import get_cache_stats
+from schema import memory_report
+
+# Workbook sheets and console reports shared by main.py and batch_runner.py
+INPUT_SHEET = "Feedback_Data"
+OUTPUT_SHEET = "Output"
+SEGMENT_SHEET = "Segment_Output"
+
+
+def print_cache_stats():
+    cache_stats = get_cache_stats()
+    if cache_stats:
+        print(f"[INFO] Sentiment cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+
+
+def print_memory_report(df):
+    report = memory_report(df)
+    print(f"[INFO] Row data uses {report.loc['Total', 'bytes'] / 1e6:.2f} MB:")
+    print(report.to_string())
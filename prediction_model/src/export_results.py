@@ -1,37 +1,68 @@
 import xlwings as xw
 import pandas as pd
+import abc
+import math
 import os
+import zipfile
 from datetime import datetime
 
-def export_to_excel(df, excel_path, sheet_name='Output'):
-    """
-    Exports the dataframe to the specified 'Output' sheet in the Excel file.
-    Creates dashboard-ready output with formatting.
-    
-    Args:
-        df (pd.DataFrame): DataFrame to export.
-        excel_path (str): Path to the Excel file.
-        sheet_name (str): Name of the sheet to export to. Default is 'Output'.
-    """
-    if df.empty:
-        print("No data to export.")
-        return
+# Where results are written: "xlwings" drives a live Excel application,
+# "openpyxl" edits the saved file directly (no Excel process needed).
+# openpyxl is opt-in (PREDICTION_MODEL_EXPORT_BACKEND=openpyxl): it cannot read
+# every workbook, drops form controls and shapes when saving, and only
+# approximates autofit. Workbooks it would damage are refused (see OPENPYXL_UNSUPPORTED_PARTS).
+EXPORT_BACKENDS = ("xlwings", "openpyxl")
+_backend_env = os.environ.get("PREDICTION_MODEL_EXPORT_BACKEND", "").strip().lower()
+EXPORT_BACKEND = _backend_env if _backend_env in EXPORT_BACKENDS else "xlwings"
 
-    print(f"Exporting results to {excel_path} [{sheet_name}]...")
-
-    # Select and order the output columns as required
-    output_columns = [
-        'Feedback Type',
-        'Average Rating',
-        'Average Sentiment Score',  
-        'Risk Level',
-        'Top Issue Summary',
-        'Recommendation',
-        'Probability Score'
-    ]
-    
-    # Filter to only include columns that exist in the dataframe
-    existing_columns = [col for col in output_columns if col in df.columns]
+# Workbook parts openpyxl does not write back: form controls (the Evaluate
+# button of add_evaluate_button.py), ActiveX controls, and drawing parts
+# (shapes, charts, images and their legacy VML drawings)
+OPENPYXL_UNSUPPORTED_PARTS = {
+    "xl/ctrlProps/": "form controls",
+    "xl/activeX/": "ActiveX controls",
+    "xl/drawings/": "drawings and shapes"
+}
+
+# Output table columns, in order; only the ones present are exported
+OUTPUT_COLUMNS = [
+    'Product',        # segment tables only
+    'Feedback Type',
+    'Period',         # segment tables with a time bucket
+    'Average Rating',
+    'Average Sentiment Score',  
+    'Risk Level',
+    'Trend',
+    'Top Issue Summary',
+    'Recommendation',
+    'Probability Score',
+    'Posterior Mean',  # Beta posterior of the issue probability
+    'Credible Lower',
+    'Credible Upper'
+]
+
+# Dashboard cells per product: summary row (H issue, I risk) and recommendation row (L)
+DASHBOARD_LAYOUT = {
+    "ATM": {"summary_row": 18, "rec_row": 18},
+    "App": {"summary_row": 19, "rec_row": 22},
+    "Loan Process": {"summary_row": 20, "rec_row": 26},
+    "Online Banking": {"summary_row": 21, "rec_row": 30},
+    "Service": {"summary_row": 22, "rec_row": 34}
+}
+
+# The table area always spans at least A:I
+MIN_TABLE_WIDTH = 9
+
+# Evaluation side panel of the Output sheet (J is a spacer, the panel sits at K2:L)
+EVALUATION_CLEAR_COLUMNS = (10, 26)  # J:Z
+EVALUATION_CELL = (2, 11)            # K2
+
+HEADER_COLOR = (68, 114, 196)  # Blue header
+HEADER_FONT_COLOR = (255, 255, 255)  # White text
+
+def build_output_frame(df):
+    """Selects, orders and rounds the exported columns and stamps 'Last Updated'."""
+    existing_columns = [col for col in OUTPUT_COLUMNS if col in df.columns]
     output_df = df[existing_columns].copy()
     
     # Add timestamp column
@@ -41,97 +72,501 @@ def export_to_excel(df, excel_path, sheet_name='Output'):
     output_df = output_df.rename(columns={
         'Average Sentiment Score': 'Sentiment Score'
     })
+    
+    # Round decimals to make it look clean like the new UI
+    for col in ['Average Rating', 'Sentiment Score']:
+        if col in output_df.columns:
+            output_df[col] = pd.to_numeric(output_df[col], errors='coerce').round(3)
+    return output_df
 
-    try:
+def _cell_value(value):
+    # Plain Python values, as a spreadsheet cell holds (and reads back) them
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+def build_output_block(output_df, width=None):
+    """
+    The output table as a 2-D list (header row first), padded with None to
+    `width` columns.
+    """
+    width = max(width or 0, len(output_df.columns))
+    pad = [None] * (width - len(output_df.columns))
+    block = [list(output_df.columns) + pad]
+    for row in output_df.astype(object).itertuples(index=False):
+        block.append([_cell_value(v) for v in row] + pad)
+    return block
+
+def _same_cell(old, new):
+    # Cells keep ~15 significant digits, so a float may read back in its last digit
+    if isinstance(old, float) and isinstance(new, float):
+        return math.isclose(old, new, rel_tol=1e-12)
+    return old == new
+
+def _same_row(old, new):
+    return len(old) == len(new) and all(_same_cell(a, b) for a, b in zip(old, new))
+
+def changed_bounds(previous, block):
+    """
+    Bounding box of the cells that differ between two 2-D blocks (missing
+    rows/cells count as empty).
+
+    Returns:
+        tuple: (first row, last row, first column, last column), 0-based and
+        inclusive, or None if nothing changed.
+    """
+    rows = max(len(previous), len(block))
+    cols = max([len(r) for r in previous] + [len(r) for r in block] + [0])
+    changed_rows, changed_cols = [], set()
+    for i in range(rows):
+        old = previous[i] if i < len(previous) else []
+        new = block[i] if i < len(block) else []
+        diff = [
+            j for j in range(cols)
+            if not _same_cell(old[j] if j < len(old) else None, new[j] if j < len(new) else None)
+        ]
+        if diff:
+            changed_rows.append(i)
+            changed_cols.update(diff)
+    if not changed_rows:
+        return None
+    return changed_rows[0], changed_rows[-1], min(changed_cols), max(changed_cols)
+
+def keep_unchanged_stamps(previous, block, column='Last Updated'):
+    """
+    Copies the previous 'Last Updated' cell into each row of `block` whose
+    other cells did not change, so the stamp tells when a row's results last
+    changed and an unchanged table diffs as unchanged. Modifies `block`.
+    """
+    if column not in block[0]:
+        return block
+    stamp = block[0].index(column)
+    for i in range(1, min(len(previous), len(block))):
+        old, new = previous[i], block[i]
+        if _same_row(old[:stamp] + old[stamp + 1:], new[:stamp] + new[stamp + 1:]):
+            new[stamp] = old[stamp]
+    return block
+
+def _column_letter(col):
+    """1-based column number -> letters (1 -> 'A', 27 -> 'AA')."""
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+def _write_table(sheet, output_df):
+    """
+    Writes the output table with as few sheet calls as possible: the current
+    table is read in one call, and only the bounding box of the changed cells
+    is written back in one assignment. Rows whose results did not change keep
+    their 'Last Updated' stamp. The area is cleared, restyled and autofit only
+    when the header (the layout) changes.
+    """
+    width = max(MIN_TABLE_WIDTH, len(output_df.columns))
+    block = build_output_block(output_df, width)
+    
+    last_row = max(sheet.last_row(), len(block))
+    previous = sheet.read(1, 1, last_row, width)
+    
+    if previous[0] != block[0]:
+        # New layout: full rewrite with formatting
+        sheet.clear(1, width)
+        sheet.write(1, 1, block)
+        
+        # Format headers (row 1) as bold
+        sheet.style_header(1, 1, len(output_df.columns))
+        
+        # Auto-fit columns
+        sheet.autofit()
+        print(f"[INFO] Layout changed: rewrote and formatted {len(block)} rows.")
+        return
+
+    bounds = changed_bounds(previous, keep_unchanged_stamps(previous, block))
+    if bounds is None:
+        print("[INFO] Output unchanged; nothing written.")
+        return
+    
+    # Rows past the new table are blanked (old table was longer)
+    blank = [None] * width
+    padded = block + [blank] * (len(previous) - len(block))
+    r0, r1, c0, c1 = bounds
+    sheet.write(r0 + 1, c0 + 1, [row[c0:c1 + 1] for row in padded[r0:r1 + 1]])
+    print(f"[INFO] Wrote changed cells {r1 - r0 + 1} rows x {c1 - c0 + 1} columns.")
+
+def dashboard_cells(final_df):
+    """
+    Dashboard values per (row, column), from the product-level results.
+    Products without results keep their current cells.
+    """
+    cells = {}
+    rows = final_df.drop_duplicates('Feedback Type').set_index('Feedback Type')
+    for product, layout in DASHBOARD_LAYOUT.items():
+        if product not in rows.index:
+            continue
+        row = rows.loc[product]
+        # Risk level in column I, top issue summary in column H, recommendation in column L
+        cells[(layout['summary_row'], 9)] = f"{product}  {row['Risk Level']}"
+        cells[(layout['summary_row'], 8)] = _cell_value(row.get('Top Issue Summary', 'General feedback'))
+        cells[(layout['rec_row'], 12)] = _cell_value(row.get('Recommendation', 'Monitor situation.'))
+    return cells
+
+def _write_dashboard(dashboard, final_df):
+    """
+    Writes risk (I18:I22), issues (H18:H22) and recommendations (L18:L34) to
+    the Dashboard. The H:I summary block is read and written as one range;
+    recommendation cells are written only when they changed.
+    """
+    cells = dashboard_cells(final_df)
+    
+    rows = [layout['summary_row'] for layout in DASHBOARD_LAYOUT.values()]
+    first, last = min(rows), max(rows)
+    current = dashboard.read(first, 8, last, 9)
+    summary = [
+        [cells.get((r, 8), current[i][0]), cells.get((r, 9), current[i][1])]
+        for i, r in enumerate(range(first, last + 1))
+    ]
+    if summary != current:
+        dashboard.write(first, 8, summary)
+    
+    # Recommendation cells are not contiguous; one read, then only changed cells
+    rec_rows = [layout['rec_row'] for layout in DASHBOARD_LAYOUT.values()]
+    first = min(rec_rows)
+    current = dashboard.read(first, 12, max(rec_rows), 12)
+    for r in rec_rows:
+        if (r, 12) in cells and current[r - first][0] != cells[(r, 12)]:
+            dashboard.write(r, 12, [[cells[(r, 12)]]])
+
+def _write_evaluation(sheet, eval_df):
+    """Writes the model performance side panel (K2:L) of the Output sheet."""
+    # Clear old evaluation area completely to wipe formatting
+    sheet.clear(*EVALUATION_CLEAR_COLUMNS)
+    
+    row, col = EVALUATION_CELL
+    sheet.write(row, col, [["--- MODEL PERFORMANCE ---"]])
+    sheet.merge_center(row, col, col + 1)
+    
+    sheet.write(row + 1, col, build_output_block(eval_df))
+    
+    # Formatting for the metrics table
+    sheet.style_header(row + 1, col, col + len(eval_df.columns) - 1)
+    
+    # Set column widths
+    sheet.column_width(col - 1, col - 1, 5)  # Spacer
+    sheet.column_width(col, col + 1, 18)
+
+def update_dashboard(wb, final_df, sheet_name='Dashboard'):
+    """Writes the Dashboard summary cells of an open xlwings workbook."""
+    _write_dashboard(_XlwingsSheet(wb.sheets[sheet_name]), final_df)
+
+
+class _XlwingsSheet:
+    """Sheet operations used by the exporter, on a live xlwings sheet (1-based rows/columns)."""
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+
+    def last_row(self):
+        return self.sheet.used_range.last_cell.row
+
+    def read(self, r0, c0, r1, c1):
+        return self.sheet.range((r0, c0), (r1, c1)).options(ndim=2).value
+
+    def write(self, row, col, block):
+        self.sheet.range((row, col), (row + len(block) - 1, col + len(block[0]) - 1)).value = block
+
+    def clear(self, c0, c1):
+        self.sheet.range(f"{_column_letter(c0)}:{_column_letter(c1)}").clear()
+
+    def style_header(self, row, c0, c1):
+        header = self.sheet.range((row, c0), (row, c1))
+        header.font.bold = True
+        header.color = HEADER_COLOR
+        header.font.color = HEADER_FONT_COLOR
+
+    def merge_center(self, row, c0, c1):
+        cells = self.sheet.range((row, c0), (row, c1))
+        cells.font.bold = True
+        try:
+            cells.merge()
+            cells.api.HorizontalAlignment = -4108 # Center
+        except:
+            pass
+
+    def column_width(self, c0, c1, width):
+        self.sheet.range(f"{_column_letter(c0)}:{_column_letter(c1)}").column_width = width
+
+    def autofit(self):
+        self.sheet.autofit('c')
+
+
+class _OpenpyxlSheet:
+    """The same sheet operations on an openpyxl worksheet."""
+
+    def __init__(self, ws):
+        self.ws = ws
+
+    def last_row(self):
+        return self.ws.max_row
+
+    def read(self, r0, c0, r1, c1):
+        return [list(row) for row in self.ws.iter_rows(min_row=r0, max_row=r1, min_col=c0, max_col=c1, values_only=True)]
+
+    def write(self, row, col, block):
+        from openpyxl.cell.cell import MergedCell
+
+        for i, values in enumerate(block):
+            for j, value in enumerate(values):
+                cell = self.ws.cell(row=row + i, column=col + j)
+                # Only the top-left cell of a merged area holds a value
+                if not isinstance(cell, MergedCell):
+                    cell.value = value
+
+    def clear(self, c0, c1):
+        from openpyxl.styles import Alignment, Font, PatternFill
+
+        # Like Range.Clear: values, formats and merges in the columns
+        for merged in list(self.ws.merged_cells.ranges):
+            if merged.min_col <= c1 and merged.max_col >= c0:
+                self.ws.unmerge_cells(str(merged))
+        for row in self.ws.iter_rows(min_col=c0, max_col=c1):
+            for cell in row:
+                cell.value = None
+                cell.font = Font()
+                cell.fill = PatternFill()
+                cell.alignment = Alignment()
+
+    def style_header(self, row, c0, c1):
+        from openpyxl.styles import Font, PatternFill
+
+        fill = PatternFill("solid", fgColor="%02X%02X%02X" % HEADER_COLOR)
+        font = Font(bold=True, color="%02X%02X%02X" % HEADER_FONT_COLOR)
+        for col in range(c0, c1 + 1):
+            cell = self.ws.cell(row=row, column=col)
+            cell.font = font
+            cell.fill = fill
+
+    def merge_center(self, row, c0, c1):
+        from openpyxl.styles import Alignment, Font
+
+        cell = self.ws.cell(row=row, column=c0)
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal="center")
+        self.ws.merge_cells(start_row=row, start_column=c0, end_row=row, end_column=c1)
+
+    def column_width(self, c0, c1, width):
+        for col in range(c0, c1 + 1):
+            self.ws.column_dimensions[_column_letter(col)].width = width
+
+    def autofit(self):
+        # No layout engine without Excel: size each column to its longest value
+        widths = {}
+        for row in self.ws.iter_rows():
+            for cell in row:
+                if cell.value is not None:
+                    widths[cell.column] = max(widths.get(cell.column, 0), len(str(cell.value)))
+        for col, width in widths.items():
+            self.ws.column_dimensions[_column_letter(col)].width = width + 2
+
+
+class _ExportSession(abc.ABC):
+    """
+    One open workbook for a run's exports; saved once when the session ends.
+    Use open_export_session() to get the session for the configured backend.
+    """
+
+    def __init__(self, excel_path):
+        self.excel_path = excel_path
+
+    @abc.abstractmethod
+    def _sheet(self, sheet_name, create=True):
+        """Sheet adapter (_XlwingsSheet/_OpenpyxlSheet) for `sheet_name`, created if missing and `create`."""
+
+    def write_table(self, df, sheet_name='Output'):
+        """Writes a results table (see build_output_frame) to `sheet_name`."""
+        if df.empty:
+            print("No data to export.")
+            return
+        print(f"Exporting results to {self.excel_path} [{sheet_name}]...")
+        output_df = build_output_frame(df)
+        _write_table(self._sheet(sheet_name), output_df)
+        print(f"[SUCCESS] Successfully exported {len(output_df)} rows to '{sheet_name}' sheet.")
+
+    def update_dashboard(self, final_df, sheet_name='Dashboard'):
+        _write_dashboard(self._sheet(sheet_name, create=False), final_df)
+
+    def write_evaluation(self, eval_df, sheet_name='Output'):
+        """Writes the evaluation metrics ('Metric', 'Value') as the side panel of `sheet_name`."""
+        print(f"Writing metrics to {sheet_name} [Range K2]...")
+        _write_evaluation(self._sheet(sheet_name), eval_df)
+
+
+class _XlwingsSession(_ExportSession):
+
+    def __init__(self, excel_path, wb=None, save=True):
+        super().__init__(excel_path)
+        self.wb = wb
+        self.save = save
+        self.app = None
+        self.created = False
+
+    def __enter__(self):
+        if self.wb is not None:
+            return self
+        
         # Check if file exists
-        if not os.path.exists(excel_path):
-            print(f"Error: File not found at {excel_path}")
-            raise FileNotFoundError(f"Excel file not found: {excel_path}")
+        if not os.path.exists(self.excel_path):
+            print(f"Error: File not found at {self.excel_path}")
+            raise FileNotFoundError(f"Excel file not found: {self.excel_path}")
 
         # Open Excel
         # Robust logic to find or open workbook
-        target_wb = None
-        app = None
-        
         # 1. Check if workbook is already open in any active Excel instance
         try:
             for book in xw.books:
-                if book.fullname.lower() == excel_path.lower():
-                    target_wb = book
-                    app = book.app
+                if book.fullname.lower() == self.excel_path.lower():
+                    self.wb = book
+                    self.app = book.app
                     break
         except Exception:
             pass # Ignore errors listing books
             
         # 2. If not found, open it
-        if target_wb:
-            wb = target_wb
+        if self.wb is not None:
             print("[SUCCESS] Connected to already open Excel workbook.")
         else:
             print("Opening Excel file...")
-            app = xw.App(visible=False)
-            wb = app.books.open(excel_path)
-        
+            self.app = xw.App(visible=False)
+            self.created = True
+            try:
+                self.wb = self.app.books.open(self.excel_path)
+            except Exception as e:
+                print(f"Error exporting to Excel: {e}")
+                self.app.quit()
+                raise
+        return self
+
+    def _sheet(self, sheet_name, create=True):
         # Check if sheet exists, if not create it
-        sheet_names = [sheet.name for sheet in wb.sheets]
+        sheet_names = [sheet.name for sheet in self.wb.sheets]
         if sheet_name in sheet_names:
-            sheet = wb.sheets[sheet_name]
-            sheet.range('A:I').clear()  # Clear table area specifically (A to I just in case it spilled)
-        else:
-            sheet = wb.sheets.add(sheet_name)
-            
-        # Round decimals to make it look clean like the new UI
-        for col in ['Average Rating', 'Sentiment Score']:
-            if col in output_df.columns:
-                try:
-                    output_df[col] = pd.to_numeric(output_df[col]).round(3)
-                except:
-                    pass
-            
-        # Write data starting at A1 without the messy pandas index!
-        sheet.range('A1').options(index=False).value = output_df
-        
-        # Format headers (row 1) as bold
-        header_range = sheet.range('A1').expand('right')
-        header_range.font.bold = True
-        header_range.color = (68, 114, 196)  # Blue header
-        header_range.font.color = (255, 255, 255)  # White text
-        
-        # Auto-fit columns
-        sheet.autofit('c')
-        
-        # Save and close
-        try:
-            wb.save()
-            print("[SUCCESS] File saved successfully.")
-        except Exception as e:
-            print(f"[WARNING] Could not save the Excel file automatically.")
-            print(f"   Reason: {e}")
-            print(f"   ACTION REQUIRED: Please go to your open Excel window and click 'Save' manually.")
-            print(f"   (Data has been written to the sheet, so you won't lose it if you save now.)")
+            return _XlwingsSheet(self.wb.sheets[sheet_name])
+        if not create:
+            raise KeyError(f"Sheet '{sheet_name}' not found")
+        return _XlwingsSheet(self.wb.sheets.add(sheet_name))
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            print(f"Error exporting to Excel: {exc}")
+        elif self.save:
+            # Save and close
+            try:
+                self.wb.save()
+                print("[SUCCESS] File saved successfully.")
+            except Exception as e:
+                print(f"[WARNING] Could not save the Excel file automatically.")
+                print(f"   Reason: {e}")
+                print(f"   ACTION REQUIRED: Please go to your open Excel window and click 'Save' manually.")
+                print(f"   (Data has been written to the sheet, so you won't lose it if you save now.)")
         
-        # Only quit if we created the app (not called from Excel)
-        if app != xw.apps.active:
+        # Only quit if we created the app; never close a workbook the user has open
+        if self.created:
             try:
-                # If we can't save, we probably shouldn't close? 
-                # Actually if we attached to an existing app (target_wb), we absolutely should NOT close it.
-                if not target_wb: 
-                    wb.close()
-                    app.quit()
+                self.wb.close()
+                self.app.quit()
             except:
                 pass
+        return False
+
+
+def openpyxl_unsupported(excel_path):
+    """
+    Returns:
+        list: Descriptions of the OPENPYXL_UNSUPPORTED_PARTS found in the workbook
+        (empty if openpyxl can save it without losing anything it knows of).
+    """
+    try:
+        with zipfile.ZipFile(excel_path) as archive:
+            names = archive.namelist()
+    except zipfile.BadZipFile:
+        return []  # Not a zip workbook; load_workbook reports it
+    return [what for prefix, what in OPENPYXL_UNSUPPORTED_PARTS.items() if any(n.startswith(prefix) for n in names)]
+
+
+class _OpenpyxlSession(_ExportSession):
+
+    def __enter__(self):
+        from openpyxl import load_workbook
+
+        if not os.path.exists(self.excel_path):
+            print(f"Error: File not found at {self.excel_path}")
+            raise FileNotFoundError(f"Excel file not found: {self.excel_path}")
         
-        print(f"[SUCCESS] Successfully exported {len(output_df)} rows to '{sheet_name}' sheet.")
+        unsupported = openpyxl_unsupported(self.excel_path)
+        if unsupported:
+            raise ValueError(
+                f"{self.excel_path} contains {', '.join(unsupported)}, which openpyxl would remove when saving. "
+                f"Export this workbook with the xlwings backend."
+            )
         
-    except Exception as e:
-        print(f"Error exporting to Excel: {e}")
-        # Try to clean up
+        # keep_vba preserves the macros of .xlsm dashboards
+        print("Opening Excel file (headless)...")
         try:
-            if 'wb' in locals() and wb:
-                wb.close()
-            if 'app' in locals() and app and app != xw.apps.active:
-                app.quit()
-        except:
-            pass
-        raise
+            self.wb = load_workbook(self.excel_path, keep_vba=self.excel_path.lower().endswith('.xlsm'))
+        except Exception as e:
+            raise ValueError(
+                f"openpyxl cannot read {self.excel_path} ({e}). Export this workbook with the xlwings backend."
+            ) from e
+        return self
+
+    def _sheet(self, sheet_name, create=True):
+        if sheet_name in self.wb.sheetnames:
+            return _OpenpyxlSheet(self.wb[sheet_name])
+        if not create:
+            raise KeyError(f"Sheet '{sheet_name}' not found")
+        return _OpenpyxlSheet(self.wb.create_sheet(sheet_name))
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            print(f"Error exporting to Excel: {exc}")
+        else:
+            self.wb.save(self.excel_path)
+            print("[SUCCESS] File saved successfully.")
+        self.wb.close()
+        return False
+
+
+def open_export_session(excel_path, backend=None, **kwargs):
+    """
+    Opens `excel_path` for writing with `backend` ("xlwings" or "openpyxl",
+    default EXPORT_BACKEND). Use as a context manager; the workbook is saved
+    once on exit.
+    """
+    backend = (backend or EXPORT_BACKEND).lower()
+    if backend == "openpyxl":
+        return _OpenpyxlSession(excel_path)
+    if backend == "xlwings":
+        return _XlwingsSession(excel_path, **kwargs)
+    raise ValueError(f"Unknown export backend '{backend}'. Choose from {EXPORT_BACKENDS}.")
+
+def export_to_excel(df, excel_path, sheet_name='Output', backend=None):
+    """
+    Exports the dataframe to the specified 'Output' sheet in the Excel file.
+    Creates dashboard-ready output with formatting.
+    
+    Args:
+        df (pd.DataFrame): DataFrame to export.
+        excel_path (str): Path to the Excel file.
+        sheet_name (str): Name of the sheet to export to. Default is 'Output'.
+        backend (str): "xlwings" or "openpyxl". Default is EXPORT_BACKEND.
+    """
+    if df.empty:
+        print("No data to export.")
+        return
 
+    with open_export_session(excel_path, backend) as session:
+        session.write_table(df, sheet_name)
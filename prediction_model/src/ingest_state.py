@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from load_data import RowWatermark
+from bayesian_model import SegmentAggregator
+from spike_detector import SpikeDetector
+
+# Saved state of incremental runs, one file per workbook (data directory, sibling to src)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_DIR = os.path.join(BASE_DIR, "data", "ingest_state")
+
+# Bumped whenever the saved layout changes; older files are ignored
+STATE_VERSION = 2
+
+
+def state_file_for(path, state_dir=None):
+    """State file of the workbook at `path`: <state_dir>/<name>-<hash of the full path>.json"""
+    path = os.path.abspath(path)
+    state_dir = state_dir or STATE_DIR
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(state_dir, f"{name}-{hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]}.json")
+
+
+class IngestState:
+    """
+    What an incremental run needs from the previous one: the ingestion
+    watermark of a workbook sheet, and the segment aggregates and sentiment
+    spike tests of exactly the rows up to that watermark. All are saved to and
+    loaded from one file, so they can never come from different runs or workbooks.
+
+    Args:
+        path (str): Workbook the state belongs to.
+        sheet_name (str): Input sheet within the workbook.
+        keys (list): Segment keys of the aggregates.
+        time_bucket (str): Period bucket of the aggregates, or None.
+    """
+
+    def __init__(self, path, sheet_name="Feedback_Data", keys=('Product',), time_bucket=None):
+        self.watermark = RowWatermark(path, sheet_name)
+        self.aggregator = SegmentAggregator(keys, time_bucket)
+        self.detector = SpikeDetector()
+
+    @property
+    def path(self):
+        return self.watermark.path
+
+    def save(self, state_file=None):
+        """Writes watermark, aggregates and spike tests together; the file is replaced atomically."""
+        state_file = state_file or state_file_for(self.path)
+        state = {
+            "version": STATE_VERSION,
+            "path": self.path,
+            "sheet": self.watermark.sheet_name,
+            "rows": self.watermark.rows,
+            "digest": self.watermark.digest,
+            "aggregates": self.aggregator.to_state(),
+            "spikes": self.detector.to_state()
+        }
+        try:
+            os.makedirs(os.path.dirname(state_file), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(state_file), prefix=".ingest_", suffix=".json")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(state, f, indent=2, default=str)
+                os.replace(tmp, state_file)
+            except Exception:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+        except Exception as e:
+            print(f"[WARNING] Could not save ingestion state: {e}")
+
+    @classmethod
+    def load(cls, path, sheet_name="Feedback_Data", keys=('Product',), time_bucket=None, state_file=None):
+        """
+        Restores the state saved for this workbook and sheet. Returns a fresh
+        state (nothing ingested) if none was saved, or if the saved one has
+        another version, workbook, sheet or segment keys.
+        """
+        state = cls(path, sheet_name, keys, time_bucket)
+        state_file = state_file or state_file_for(state.path)
+        if not os.path.exists(state_file):
+            return state
+        try:
+            with open(state_file, "r") as f:
+                saved = json.load(f)
+        except Exception as e:
+            print(f"[WARNING] Could not load ingestion state ({e}). Starting from the first row.")
+            return state
+
+        aggregates = saved.get("aggregates") or {}
+        matches = (
+            saved.get("version") == STATE_VERSION
+            and saved.get("path") == state.path
+            and saved.get("sheet") == sheet_name
+            and aggregates.get("keys") == list(keys)
+            and aggregates.get("time_bucket") == time_bucket
+        )
+        if not matches:
+            print("[INFO] Saved ingestion state is for another workbook, sheet or segmentation. Starting from the first row.")
+            return state
+
+        state.watermark.rows = saved["rows"]
+        state.watermark.digest = saved["digest"]
+        state.aggregator = SegmentAggregator.from_state(aggregates)
+        state.detector = SpikeDetector.from_state(saved["spikes"])
+        return state
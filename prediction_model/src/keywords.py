@@ -0,0 +1,156 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Issue keywords reported per comment (nlp_engine)
+TRIGGER_WORDS = [
+    "network", "failed", "slow", "crash",
+    "timeout", "rude", "delay", "error",
+    "cannot", "issue", "problem", "wait", "charged", "refund", "login",
+    "broken", "horrible", "fraud", "stuck", "useless", "down", "terrible"
+]
+
+# Keyword Priors: High-impact words boost the Sentiment Prob (bayesian_model)
+KEYWORD_PRIORS = {
+    "crash": 0.95,
+    "failed": 0.9,
+    "broken": 0.9,
+    "fraud": 0.95,
+    "down": 0.85,
+    "terrible": 0.85,
+    "error": 0.8
+}
+
+# Emergency sentiment fallback when neither BERT nor TextBlob is available (bert_sentiment)
+NEGATIVE_WORDS = ["bad", "terrible", "fail", "slow", "error", "issue", "broken", "worst", "rude"]
+POSITIVE_WORDS = ["good", "great", "fast", "excellent", "love", "best", "fixed"]
+
+# Group-level keyword counts are output as one column per trigger word
+KEYWORD_COUNT_PREFIX = "Count: "
+
+# A term also matches its common inflections ("crash" -> "crashed", "crashes", "crashing")
+INFLECTIONS = ("", "s", "es", "d", "ed", "ing", "ly")
+
+
+class KeywordMatcher:
+    """
+    Finds the terms of several lexicons in one pass over the text.
+
+    All lexicons are compiled into a single alternation regex of whole words
+    (each term plus its INFLECTIONS). Every matched word is mapped back to the
+    terms it stands for, so overlapping lexicons ("fail" and "failed") are
+    resolved without rescanning.
+
+    Args:
+        lexicons (dict): Lexicon name -> iterable of terms.
+    """
+
+    def __init__(self, lexicons):
+        self.lexicons = {name: list(dict.fromkeys(t.lower() for t in terms)) for name, terms in lexicons.items()}
+
+        # word form -> [(lexicon, term, rank within lexicon)]
+        self._forms = {}
+        for name, terms in self.lexicons.items():
+            for rank, term in enumerate(terms):
+                for suffix in INFLECTIONS:
+                    self._forms.setdefault(term + suffix, []).append((name, term, rank))
+
+        # Longest first so the alternation prefers the full word
+        alternation = "|".join(re.escape(f) for f in sorted(self._forms, key=len, reverse=True))
+        self.pattern = re.compile(rf"\b({alternation})\b")
+
+        self._form_table = pd.DataFrame(
+            [(form, name, term, rank) for form, hits in self._forms.items() for name, term, rank in hits],
+            columns=["form", "lexicon", "term", "rank"]
+        )
+
+    def find(self, text):
+        """
+        Returns:
+            dict: Lexicon name -> matched terms (unique, in lexicon order).
+        """
+        found = {name: {} for name in self.lexicons}
+        if text:
+            for form in self.pattern.findall(str(text).lower()):
+                for name, term, rank in self._forms[form]:
+                    found[name][term] = rank
+        return {name: sorted(hits, key=hits.get) for name, hits in found.items()}
+
+    def find_terms(self, text, lexicon):
+        """Matched terms of a single lexicon, unique and in lexicon order."""
+        return self.find(text)[lexicon]
+
+    def find_series(self, series, lexicon):
+        """
+        Vectorized find_terms over a whole Series (str.extractall).
+
+        Returns:
+            pd.Series: List of matched terms per row, aligned with `series`.
+        """
+        text = series.where(series.notna() & series.astype(bool), "").astype(str).str.lower()
+        text.index = pd.RangeIndex(len(text))
+
+        matches = text.str.extractall(self.pattern)[0].rename("form").reset_index(level=0)
+        table = self._form_table[self._form_table["lexicon"] == lexicon]
+        hits = (
+            matches.merge(table, on="form")
+            .drop_duplicates(["level_0", "term"])
+            .sort_values(["level_0", "rank"])
+        )
+        terms = hits.groupby("level_0")["term"].agg(list)
+
+        result = [[] for _ in range(len(text))]
+        for pos, row_terms in terms.items():
+            result[pos] = row_terms
+        return pd.Series(result, index=series.index, dtype=object)
+
+
+MATCHER = KeywordMatcher({
+    "trigger": TRIGGER_WORDS,
+    "priors": KEYWORD_PRIORS,
+    "negative": NEGATIVE_WORDS,
+    "positive": POSITIVE_WORDS
+})
+
+
+def _hot_categories(categories, terms):
+    """
+    Multi-hot rows for the distinct keyword strings of a categorical column.
+    An extra all-False row at the end is selected by code -1 (missing).
+    """
+    column = {term: j for j, term in enumerate(terms)}
+    hot = np.zeros((len(categories) + 1, len(terms)), dtype=bool)
+    for i, category in enumerate(categories):
+        for word in str(category).split(", "):
+            if word in column:
+                hot[i, column[word]] = True
+    return hot
+
+def keyword_counts(keywords, by, terms=TRIGGER_WORDS):
+    """
+    Per-group keyword counts: the multi-hot matrix of `keywords` summed by `by`.
+    Rows are counted per (group, distinct keyword set) first, so the cost is one
+    groupby over integer codes plus a small matrix product.
+
+    Args:
+        keywords (pd.Series): Comma-separated keywords per row (categorical or string).
+        by (pd.Series or pd.DataFrame): Group label(s) per row, aligned with `keywords`.
+
+    Returns:
+        pd.DataFrame: Groups x terms matrix of row counts.
+    """
+    keywords = keywords.astype('category')
+    hot = _hot_categories(keywords.cat.categories, terms).astype(np.int64)
+
+    pairs = by.to_frame() if isinstance(by, pd.Series) else by.copy()
+    group_cols = list(pairs.columns)
+    pairs['_code'] = keywords.cat.codes.to_numpy()
+    per_code = pairs.groupby(group_cols + ['_code'], dropna=False, observed=True).size().unstack(fill_value=0)
+    if per_code.empty:
+        return pd.DataFrame(columns=list(terms), dtype=np.int64)
+
+    return pd.DataFrame(
+        per_code.to_numpy() @ hot[per_code.columns.to_numpy()],
+        index=per_code.index,
+        columns=list(terms)
+    )
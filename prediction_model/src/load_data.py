@@ -1,124 +1,363 @@
 import pandas as pd
+import csv
+import hashlib
+import io
 import os
+import sys
 import xlwings as xw
+from snapshot_cache import load_snapshot, save_snapshot
+from schema import apply_schema
 
-def load_feedback_data(excel_path, sheet_name="Feedback_Data"):
+# Canonical names the model expects
+REQUIRED_MAP = {
+    'Date': ['date', 'time', 'timestamp'],
+    'Product': ['product', 'item', 'category', 'feedback type'], 
+    'SubCategory': ['subtype', 'sub-type'], 
+    'Rating': ['rating', 'score', 'ratings'],
+    'Comment': ['comment', 'comments', 'feedback text', 'text'],
+    'Status': ['status', 'state']
+}
+
+# SubCategory is optional
+OPTIONAL = ['SubCategory']
+
+CORE_SERVICES = ['ATM', 'Online Banking', 'App', 'Service', 'Loan Process']
+
+# Columns kept for the model
+EXPECTED_COLS = ['Date', 'Product', 'Feedback Type', 'Rating', 'Comment', 'Status']
+
+DEFAULT_CHUNKSIZE = 50_000
+
+# Headless mode skips the xlwings live connection and streams the saved file.
+# Default: on wherever Excel cannot run (anything but Windows/macOS), or with PREDICTION_MODEL_HEADLESS=1
+_headless_env = os.environ.get("PREDICTION_MODEL_HEADLESS", "").strip().lower()
+HEADLESS = _headless_env in ("1", "true", "yes") if _headless_env else sys.platform not in ("win32", "darwin")
+
+def _map_columns(actual_cols, sheet_name):
     """
-    Loads feedback data from a specific Excel sheet and validates structure.
-    Uses fuzzy matching for column headers to be robust against Excel formatting.
+    Fuzzy header mapping: returns {actual column: canonical name}.
+    Raises ValueError if a required column cannot be found.
+    """
+    normalized_actual = [str(c).strip().lower() for c in actual_cols]
+    new_columns = {}
+    mapped_indices = set()
+    missing = []
+
+    # Pass 1: Exact Matches
+    for canonical, aliases in REQUIRED_MAP.items():
+        low_can = canonical.lower()
+        if low_can in normalized_actual:
+            idx = normalized_actual.index(low_can)
+            new_columns[actual_cols[idx]] = canonical
+            mapped_indices.add(idx)
+
+    # Pass 2: Alias/Partial Matches
+    for canonical, aliases in REQUIRED_MAP.items():
+        if canonical in new_columns.values():
+            continue # Already found exact match
+        
+        found = False
+        for alias in aliases:
+            for i, act in enumerate(normalized_actual):
+                if i in mapped_indices: continue
+                if alias in act or act in alias:
+                    new_columns[actual_cols[i]] = canonical
+                    mapped_indices.add(i)
+                    found = True
+                    break
+            if found: break
+        
+        if not found:
+            missing.append(canonical)
+
+    # Manage missing columns (SubCategory is now optional)
+    critical_missing = [m for m in missing if m not in OPTIONAL]
+    
+    if critical_missing:
+        found_cols = [list(actual_cols)]
+        print(f"[ERROR] FOUND COLUMNS: {found_cols}")
+        error_msg = f"Missing required columns in '{sheet_name}': {critical_missing}.\nWe found these columns instead: {found_cols}"
+        print(f"[ERROR] {error_msg}")
+        raise ValueError(error_msg)
+
+    return new_columns
+
+def _prepare_frame(df, new_columns):
     """
-    # Canonical names the model expects
-    REQUIRED_MAP = {
-        'Date': ['date', 'time', 'timestamp'],
-        'Product': ['product', 'item', 'category', 'feedback type'], 
-        'SubCategory': ['subtype', 'sub-type'], 
-        'Rating': ['rating', 'score', 'ratings'],
-        'Comment': ['comment', 'comments', 'feedback text', 'text'],
-        'Status': ['status', 'state']
-    }
+    Renames, cleans and filters a raw sheet (or chunk of it), then casts the
+    columns to the compact dtypes of schema.SCHEMA.
+
+    Returns:
+        tuple: (prepared DataFrame, number of rows dropped by the service filter)
+    """
+    # Rename columns to their canonical names
+    df = df.rename(columns=new_columns)
+    
+    # Add missing optional columns
+    for opt in OPTIONAL:
+        if opt not in df.columns:
+            df[opt] = "General"
     
-    CORE_SERVICES = ['ATM', 'Online Banking', 'App', 'Service', 'Loan Process']
+    # Maintain compatibility: Rename SubCategory back to Feedback Type for the model
+    df = df.rename(columns={'SubCategory': 'Feedback Type'})
+    
+    # Keep only the ones we need for the model
+    df = df[EXPECTED_COLS]
+    
+    # 3. Minimal data cleaning
+    df = df.dropna(how='all') 
+    
+    # 4. Strict Category Filter (ATM, Online Banking, App, Service, Loan Process)
+    initial_count = len(df)
+    df = df[df['Product'].isin(CORE_SERVICES)]
+    return apply_schema(df.copy()), initial_count - len(df)
 
+def load_feedback_data(excel_path, sheet_name="Feedback_Data", headless=None, use_snapshot=True):
+    """
+    Loads feedback data from a specific Excel sheet and validates structure.
+    Uses fuzzy matching for column headers to be robust against Excel formatting.
+    With `headless` (default: HEADLESS) only the saved file is read, streaming
+    just the requested sheet; no Excel instance is needed.
+    Headless loads are cached as a columnar snapshot (see snapshot_cache), so an
+    unchanged workbook is not parsed again.
+    """
+    headless = HEADLESS if headless is None else headless
     print(f"Loading data from {excel_path} [{sheet_name}]...")
 
     if not os.path.exists(excel_path):
         print(f"Error: File not found at {excel_path}")
         raise FileNotFoundError(f"Excel file not found: {excel_path}")
 
+    if headless and use_snapshot:
+        df = load_snapshot(excel_path, sheet_name)
+        if df is not None:
+            print(f"[SUCCESS] Loaded {len(df)} rows from snapshot (workbook unchanged).")
+            return df
+
     try:
-        # 1. Try Live Connection first (avoids "File in Use" locks)
-        try:
-            try:
-                wb = xw.Book.caller()
-            except:
-                wb = xw.books.active
-            
-            if wb.fullname.lower() != os.path.abspath(excel_path).lower():
-                 wb = xw.Book(excel_path)
-            
-            sht = wb.sheets[sheet_name]
-            # Use used_range instead of expand() to gracefully handle blank rows/columns
-            df = sht.used_range.options(pd.DataFrame, index=False).value
-            print(f"[SUCCESS] Connected live to {wb.name}")
-            
-        except Exception as live_e:
-            print(f"[WARNING] Live connection unavailable or blocked by Edit Mode. Falling back to saved file...")
-            df = pd.read_excel(excel_path, sheet_name=sheet_name)
+        if headless:
+            df = read_sheet_headless(excel_path, sheet_name)
+        else:
+            df = _read_sheet_live(excel_path, sheet_name)
         
         # 2. Fuzzy Header Mapping (New robust logic)
-        actual_cols = df.columns.tolist()
-        normalized_actual = [str(c).strip().lower() for c in actual_cols]
-        new_columns = {}
-        mapped_indices = set()
-        missing = []
-
-        # Pass 1: Exact Matches
-        for canonical, aliases in REQUIRED_MAP.items():
-            low_can = canonical.lower()
-            if low_can in normalized_actual:
-                idx = normalized_actual.index(low_can)
-                new_columns[actual_cols[idx]] = canonical
-                mapped_indices.add(idx)
-
-        # Pass 2: Alias/Partial Matches
-        for canonical, aliases in REQUIRED_MAP.items():
-            if canonical in new_columns.values():
-                continue # Already found exact match
-            
-            found = False
-            for alias in aliases:
-                for i, act in enumerate(normalized_actual):
-                    if i in mapped_indices: continue
-                    if alias in act or act in alias:
-                        new_columns[actual_cols[i]] = canonical
-                        mapped_indices.add(i)
-                        found = True
-                        break
-                if found: break
-            
-            if not found:
-                missing.append(canonical)
-
-        # Manage missing columns (SubCategory is now optional)
-        OPTIONAL = ['SubCategory']
-        critical_missing = [m for m in missing if m not in OPTIONAL]
-        
-        if critical_missing:
-            found_cols = [df.columns.tolist()]
-            print(f"[ERROR] FOUND COLUMNS: {found_cols}")
-            error_msg = f"Missing required columns in '{sheet_name}': {critical_missing}.\nWe found these columns instead: {found_cols}"
-            print(f"[ERROR] {error_msg}")
-            raise ValueError(error_msg)
-
-        # Rename columns to their canonical names
-        df = df.rename(columns=new_columns)
-        
-        # Add missing optional columns
-        for opt in OPTIONAL:
-            if opt not in df.columns:
-                df[opt] = "General"
-        
-        # Maintain compatibility: Rename SubCategory back to Feedback Type for the model
-        df = df.rename(columns={'SubCategory': 'Feedback Type'})
-        
-        # Keep only the ones we need for the model
-        expected_cols = ['Date', 'Product', 'Feedback Type', 'Rating', 'Comment', 'Status']
-        df = df[expected_cols]
-        
-        # 3. Minimal data cleaning
-        df = df.dropna(how='all') 
-        
-        # 4. Strict Category Filter (ATM, Online Banking, App, Service, Loan Process)
-        if 'Product' in df.columns:
-            initial_count = len(df)
-            df = df[df['Product'].isin(CORE_SERVICES)]
-            lost = initial_count - len(df)
-            if lost > 0:
-                print(f"[INFO] Filtered out {lost} rows not belonging to core services.")
+        new_columns = _map_columns(df.columns.tolist(), sheet_name)
+        df, lost = _prepare_frame(df, new_columns)
+        if lost > 0:
+            print(f"[INFO] Filtered out {lost} rows not belonging to core services.")
         
         print(f"[SUCCESS] Successfully loaded {len(df)} rows after service filtering.")
+        if headless and use_snapshot:
+            save_snapshot(excel_path, sheet_name, df)
         return df
 
     except Exception as e:
         print(f"Unexpected error loading data: {e}")
         raise
+
+def _read_sheet_live(excel_path, sheet_name):
+    # 1. Try Live Connection first (avoids "File in Use" locks)
+    try:
+        try:
+            wb = xw.Book.caller()
+        except:
+            wb = xw.books.active
+        
+        if wb.fullname.lower() != os.path.abspath(excel_path).lower():
+             wb = xw.Book(excel_path)
+        
+        sht = wb.sheets[sheet_name]
+        # Use used_range instead of expand() to gracefully handle blank rows/columns
+        df = sht.used_range.options(pd.DataFrame, index=False).value
+        print(f"[SUCCESS] Connected live to {wb.name}")
+        return df
+        
+    except Exception as live_e:
+        print(f"[WARNING] Live connection unavailable or blocked by Edit Mode. Falling back to saved file...")
+        return read_sheet_headless(excel_path, sheet_name)
+
+def read_sheet_headless(path, sheet_name="Feedback_Data"):
+    """
+    Reads one sheet of the saved workbook without Excel: values only, streamed
+    with openpyxl read-only mode, limited to the header's columns and skipping
+    blank rows. Other sheets of the workbook are never parsed.
+    """
+    chunks = list(_iter_raw_chunks(path, sheet_name, DEFAULT_CHUNKSIZE))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+def _iter_raw_chunks(path, sheet_name, chunksize):
+    """Yields the raw sheet (or CSV export) as DataFrames of at most `chunksize` rows."""
+    if path.lower().endswith('.csv'):
+        yield from pd.read_csv(path, chunksize=chunksize)
+        return
+
+    rows = _iter_sheet_rows(path, sheet_name)
+    header = next(rows, None)
+    if header is None:
+        return
+    buffer = []
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) >= chunksize:
+            yield pd.DataFrame(buffer, columns=header)
+            buffer = []
+    if buffer:
+        yield pd.DataFrame(buffer, columns=header)
+
+def _iter_sheet_rows(path, sheet_name):
+    """Yields the header tuple of a sheet, then its non-blank rows as value tuples."""
+    if path.lower().endswith('.csv'):
+        with open(path, newline='') as f:
+            yield from (tuple(row) for row in csv.reader(f) if any(row))
+        return
+
+    from openpyxl import load_workbook
+
+    # read_only streams rows from the file instead of building the whole sheet
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name]
+        header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
+        if header is None:
+            return
+        # Only read as far right as the last named header column
+        named = [i for i, h in enumerate(header) if h is not None]
+        if not named:
+            return
+        header = header[:named[-1] + 1]
+        yield header
+        for row in ws.iter_rows(min_row=2, max_col=len(header), values_only=True):
+            # Formatted but empty rows are reported by read-only mode; skip them
+            if all(v is None for v in row):
+                continue
+            yield row
+    finally:
+        wb.close()
+
+def iter_feedback_chunks(path, sheet_name="Feedback_Data", chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Streaming version of load_feedback_data for sheets too large to hold in memory.
+    Reads the saved file (.xlsx/.xlsm via openpyxl read-only mode, or .csv) in
+    fixed-size chunks and applies the same header mapping and filters.
+
+    Yields:
+        pd.DataFrame: Prepared chunks of at most `chunksize` rows.
+    """
+    print(f"Streaming data from {path} [{sheet_name}] in chunks of {chunksize}...")
+
+    if not os.path.exists(path):
+        print(f"Error: File not found at {path}")
+        raise FileNotFoundError(f"Excel file not found: {path}")
+
+    new_columns = None
+    total = lost = 0
+    for raw in _iter_raw_chunks(path, sheet_name, chunksize):
+        if new_columns is None:
+            new_columns = _map_columns(raw.columns.tolist(), sheet_name)
+        chunk, chunk_lost = _prepare_frame(raw, new_columns)
+        total += len(chunk)
+        lost += chunk_lost
+        if not chunk.empty:
+            yield chunk
+
+    if lost > 0:
+        print(f"[INFO] Filtered out {lost} rows not belonging to core services.")
+    print(f"[SUCCESS] Streamed {total} rows after service filtering.")
+
+def _row_keys(df):
+    # Row content hash plus occurrence number, so duplicate rows are matched one-to-one
+    hashes = pd.util.hash_pandas_object(df[EXPECTED_COLS].astype(str), index=False)
+    occurrence = hashes.groupby(hashes).cumcount()
+    return pd.MultiIndex.from_arrays([hashes.to_numpy(), occurrence.to_numpy()])
+
+def diff_rows(old, new):
+    """
+    Compares two loads of the same sheet by row content (row order is ignored).
+
+    Returns:
+        tuple: (rows of `new` that are not in `old`, rows of `old` that are not in `new`)
+    """
+    old_keys, new_keys = _row_keys(old), _row_keys(new)
+    added = new[~new_keys.isin(old_keys)]
+    removed = old[~old_keys.isin(new_keys)]
+    return added, removed
+
+class RowWatermark:
+    """
+    Ingestion position of an append-mostly sheet: the number of data rows
+    already processed and a rolling SHA-256 over the header and those rows.
+
+    Args:
+        path (str): Workbook the watermark belongs to.
+        sheet_name (str): Sheet within the workbook.
+    """
+
+    def __init__(self, path, sheet_name="Feedback_Data", rows=0, digest=None):
+        self.path = os.path.abspath(path)
+        self.sheet_name = sheet_name
+        self.rows = rows
+        self.digest = digest
+
+def load_new_rows(path, watermark):
+    """
+    Returns the rows appended to the sheet since `watermark`.
+
+    Rows up to the watermark are only hashed, never converted or scored. If
+    their hash no longer matches (an earlier row was edited, deleted or
+    inserted, or the header changed) the whole sheet is returned instead.
+
+    `watermark` itself is left as is: the caller replaces it with the returned
+    one only once the new rows are scored and aggregated, so rows that fail
+    to process are read again on the next run.
+
+    Returns:
+        tuple: (prepared DataFrame of new rows, True if this was a full reload,
+        RowWatermark after these rows)
+    """
+    if not os.path.exists(path):
+        print(f"Error: File not found at {path}")
+        raise FileNotFoundError(f"Excel file not found: {path}")
+
+    rows = _iter_sheet_rows(path, watermark.sheet_name)
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame(columns=EXPECTED_COLS), watermark.rows > 0, RowWatermark(path, watermark.sheet_name)
+
+    digest = hashlib.sha256(repr(header).encode("utf-8"))
+    seen = 0
+    verified = watermark.rows == 0
+    new = []
+    for row in rows:
+        digest.update(repr(row).encode("utf-8"))
+        seen += 1
+        if verified:
+            new.append(row)
+        elif seen == watermark.rows:
+            if digest.hexdigest() != watermark.digest:
+                break
+            verified = True
+
+    if not verified:
+        print("[INFO] Earlier rows changed since the last run. Reloading the full sheet.")
+        new_rows, _, advanced = load_new_rows(path, RowWatermark(path, watermark.sheet_name))
+        return new_rows, True, advanced
+
+    full_reload = watermark.rows == 0
+    advanced = RowWatermark(path, watermark.sheet_name, seen, digest.hexdigest())
+
+    if path.lower().endswith('.csv'):
+        # Re-parse the new lines so values get the same types as read_csv gives
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([header] + new)
+        buffer.seek(0)
+        raw = pd.read_csv(buffer)
+    else:
+        raw = pd.DataFrame(new, columns=header)
+
+    df, lost = _prepare_frame(raw, _map_columns(list(header), watermark.sheet_name))
+    if lost > 0:
+        print(f"[INFO] Filtered out {lost} rows not belonging to core services.")
+    print(f"[SUCCESS] {len(df)} new rows after row {seen - len(new)} ({seen} rows in sheet).")
+    return df, full_reload, advanced
@@ -1,43 +1,122 @@
-from bert_sentiment import get_negative_probability
-
-TRIGGER_WORDS = [
-    "network", "failed", "slow", "crash",
-    "timeout", "rude", "delay", "error",
-    "cannot", "issue", "problem", "wait", "charged", "refund", "login",
-    "broken", "horrible", "fraud", "stuck", "useless", "down", "terrible"
-]
-
-def extract_keywords(text):
-    if not text:
-        return []
-    text = str(text).lower()
-    return [word for word in TRIGGER_WORDS if word in text]
-
-def analyze_comment(comment):
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from sentiment_cache import normalize_text, reset_default_cache
+from keywords import MATCHER
+from bert_sentiment import (
+    get_negative_probabilities, configure_threads, warmup, DEFAULT_BATCH_SIZE
+)
+
+def _init_worker(num_threads):
+    # Runs once per worker process: drop any cache connection inherited from
+    # the parent, pin threads, then load the model
+    reset_default_cache()
+    configure_threads(num_threads)
+    warmup()
+
+def _score_shard(texts, batch_size):
+    return get_negative_probabilities(texts, batch_size=batch_size)
+
+class ScoringPool:
     """
-    Analyzes a single comment for sentiment and keywords.
+    Process pool for sentiment scoring, started on first use and reused by
+    every analyze_comments call of a run (e.g. each chunk of a streamed
+    sheet), so each worker loads the model once.
+
+    Workers are spawned rather than forked: each opens its own sentiment
+    cache connection, and pins its intra-op threads (cpu_count // workers, so
+    the pool does not oversubscribe the cores) before torch starts its pool.
+    Use as a context manager, or call close().
+    """
+
+    def __init__(self, workers):
+        self.workers = max(1, int(workers))
+        self.threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._executor = None
+
+    def score(self, comments, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Scores `comments` across the pool. Shards are contiguous, and results
+        are concatenated in submission order, so row order is preserved.
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.threads,)
+            )
+        # A few shards per worker keeps the pool busy when comment lengths are uneven
+        shard_size = max(batch_size, -(-len(comments) // (self.workers * 4)))
+        shards = [comments[i:i + shard_size] for i in range(0, len(comments), shard_size)]
+        return np.concatenate(list(self._executor.map(_score_shard, shards, repeat(batch_size))))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+def _factorize_comments(comments):
     """
-    sentiment_prob = get_negative_probability(comment)
-    keywords = extract_keywords(comment)
+    Groups comments that are identical after normalization (case and whitespace).
 
-    return {
-        "sentiment_prob": sentiment_prob,
-        "keywords": keywords,
-        "keywords_str": ", ".join(keywords) # Helper for display
-    }
+    Returns:
+        codes (np.ndarray): Index into `representatives` for each row, -1 for missing comments.
+        representatives (list): First original comment of each distinct group.
+    """
+    keys = comments.map(lambda c: normalize_text(c) if isinstance(c, str) else c)
+    codes, uniques = pd.factorize(keys)
+    _, first_idx = np.unique(codes, return_index=True)
+    if len(codes) and codes[first_idx[0]] == -1:
+        first_idx = first_idx[1:]
+    return codes, comments.iloc[first_idx].tolist()
 
-def analyze_comments(df):
+def analyze_comments(df, batch_size=DEFAULT_BATCH_SIZE, workers=1, pool=None):
     """
-    Wrapper for DataFrame processing to maintain compatibility with existing flow,
-    though main.py will likely switch to row-by-row.
+    Wrapper for DataFrame processing to maintain compatibility with existing flow.
+    Only distinct comments are analyzed; results are broadcast back to every row.
+    Sentiment is scored in batches through get_negative_probabilities.
+    With workers > 1 the comments are sharded across a process pool: `pool`
+    (a ScoringPool shared by the calls of a run) or one started for this call.
     """
     if df.empty or 'Comment' not in df.columns:
         return df
 
-    results = df['Comment'].apply(analyze_comment)
-    
-    # Expand dictionary results into columns
-    df['Sentiment Score'] = results.apply(lambda x: x['sentiment_prob'])
-    df['Keywords'] = results.apply(lambda x: x['keywords_str'])
+    codes, comments = _factorize_comments(df['Comment'])
+    dup_ratio = 1 - len(comments) / len(codes)
+    print(f"[INFO] NLP dedup: {len(comments)} distinct of {len(codes)} comments ({dup_ratio:.1%} duplicates)")
+
+    workers = pool.workers if pool is not None else max(1, int(workers))
+    if workers > 1 and len(comments) > batch_size:
+        if pool is not None:
+            probs = pool.score(comments, batch_size)
+        else:
+            with ScoringPool(workers) as pool:
+                probs = pool.score(comments, batch_size)
+    else:
+        probs = get_negative_probabilities(comments, batch_size=batch_size)
+    keyword_lists = MATCHER.find_series(pd.Series(comments, dtype=object), "trigger")
+
+    # Keywords are stored as categorical codes: one string per distinct keyword
+    # set, plus a trailing "" for missing comments
+    kw_codes, kw_categories = pd.factorize(
+        pd.Series([", ".join(k) for k in keyword_lists] + [""], dtype=object)
+    )
+
+    # codes == -1 (missing comment) picks the trailing neutral entry
+    df['Sentiment Score'] = np.append(probs, 0.5).astype(np.float32)[codes]
+    df['Keywords'] = pd.Categorical.from_codes(kw_codes[codes], categories=kw_categories)
     
     return df
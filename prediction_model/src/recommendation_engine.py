@@ -1,11 +1,102 @@
+import heapq
+import numpy as np
 import pandas as pd
+from keywords import TRIGGER_WORDS, KEYWORD_COUNT_PREFIX
+
+# Recommendation mapping based on Feedback Type and Risk Level
+DEFAULT_RECOMMENDATIONS = {
+    "Critical": {
+        "default": "Immediate investigation required. Escalate to senior management and deploy dedicated resources."
+    },
+    "Warning": {
+        "default": "Improve follow-up process and monitor trends closely. Schedule review within 2 weeks."
+    },
+    "Stable": {
+        "default": "Continue current monitoring practices. Maintain quality standards."
+    }
+}
+
+# Specific recommendations by Feedback Type
+SPECIFIC_RECOMMENDATIONS = {
+    "ATM": {
+        "Critical": "Immediate maintenance required for ATM network. Check for hardware failures and cash availability.",
+        "Warning": "Increase ATM cash replenishment frequency. Schedule preventive maintenance.",
+        "Stable": "ATM network operating normally. Continue regular maintenance schedule."
+    },
+    "POS": {
+        "Critical": "Critical POS terminal issues detected. Deploy technical team for urgent repairs.",
+        "Warning": "Monitor POS transaction success rates. Update firmware if necessary.",
+        "Stable": "POS terminals functioning well. Maintain current support levels."
+    },
+    "Mobile App": {
+        "Critical": "App experiencing critical issues. Roll back recent updates and investigate server capacity.",
+        "Warning": "Address app performance concerns. Conduct user testing and optimize load times.",
+        "Stable": "Mobile app performance is satisfactory. Continue feature enhancements."
+    },
+    "Online Banking": {
+        "Critical": "Critical online banking issues. Check server status and security protocols immediately.",
+        "Warning": "Improve online banking user experience. Address login and navigation issues.",
+        "Stable": "Online banking service running smoothly. Monitor for security threats."
+    },
+    "Customer Service": {
+        "Critical": "Immediate customer service improvements needed. Increase staffing and conduct training.",
+        "Warning": "Enhance customer service processes. Reduce wait times and improve staff responsiveness.",
+        "Stable": "Customer service performing well. Maintain current service quality."
+    },
+    "Loan Services": {
+        "Critical": "Critical issues in loan processing. Streamline approval process and fix system bugs.",
+        "Warning": "Improve loan application processing times. Clarify documentation requirements.",
+        "Stable": "Loan services meeting expectations. Continue efficient processing."
+    }
+}
+
+FALLBACK_RECOMMENDATION = 'Monitor situation and take appropriate action.'
+TOP_ISSUES = 3
+
+# (Product, Risk Level) -> recommendation, joined in one merge
+RECOMMENDATION_TABLE = pd.DataFrame(
+    [(product, level, rec) for product, recs in SPECIFIC_RECOMMENDATIONS.items() for level, rec in recs.items()],
+    columns=['_product', 'Risk Level', '_specific']
+)
+DEFAULT_TABLE = pd.DataFrame(
+    [(level, recs['default']) for level, recs in DEFAULT_RECOMMENDATIONS.items()],
+    columns=['Risk Level', '_default']
+)
+
+def top_issues(counts, k=TOP_ISSUES, terms=TRIGGER_WORDS):
+    """
+    Top-k keywords per row of a keyword count matrix (heap-based), most frequent first.
+    Ties keep the order of `terms`.
+    
+    Returns:
+        list: Comma-separated top issues per row ("" where no keyword was seen).
+    """
+    result = []
+    for row in np.asarray(counts):
+        nonzero = np.flatnonzero(row)
+        top = heapq.nlargest(k, nonzero, key=lambda j: (row[j], -j))
+        result.append(", ".join(terms[j] for j in top))
+    return result
+
+def _keyword_string_counts(keywords):
+    # Tables without count columns: each listed keyword counts once
+    counts = np.zeros((len(keywords), len(TRIGGER_WORDS)), dtype=np.int64)
+    column = {w: j for j, w in enumerate(TRIGGER_WORDS)}
+    for i, value in enumerate(keywords):
+        if isinstance(value, str):
+            for word in value.split(','):
+                j = column.get(word.strip())
+                if j is not None:
+                    counts[i, j] += 1
+    return counts
 
 def generate_recommendations(risk_df):
     """
     Generates business-actionable recommendations based on Risk Level and Feedback Type.
     
     Args:
-        risk_df (pd.DataFrame): DataFrame with 'Risk Level', 'Feedback Type', 'Keywords'.
+        risk_df (pd.DataFrame): DataFrame with 'Risk Level', 'Feedback Type' and either
+            per-keyword count columns or 'Keywords'.
         
     Returns:
         pd.DataFrame: DataFrame with 'Top Issue Summary' and 'Recommendation' columns.
@@ -15,92 +106,30 @@ def generate_recommendations(risk_df):
     
     print("Generating recommendations...")
     
-    # Recommendation mapping based on Feedback Type and Risk Level
-    recommendations = {
-        "Critical": {
-            "default": "Immediate investigation required. Escalate to senior management and deploy dedicated resources."
-        },
-        "Warning": {
-            "default": "Improve follow-up process and monitor trends closely. Schedule review within 2 weeks."
-        },
-        "Stable": {
-            "default": "Continue current monitoring practices. Maintain quality standards."
-        }
-    }
+    # Segment tables carry the product in 'Product' ('Feedback Type' is then the sub-type);
+    # the product-level table stores it in 'Feedback Type'
+    product_col = 'Product' if 'Product' in risk_df.columns else 'Feedback Type'
     
-    # Specific recommendations by Feedback Type
-    specific_recs = {
-        "ATM": {
-            "Critical": "Immediate maintenance required for ATM network. Check for hardware failures and cash availability.",
-            "Warning": "Increase ATM cash replenishment frequency. Schedule preventive maintenance.",
-            "Stable": "ATM network operating normally. Continue regular maintenance schedule."
-        },
-        "POS": {
-            "Critical": "Critical POS terminal issues detected. Deploy technical team for urgent repairs.",
-            "Warning": "Monitor POS transaction success rates. Update firmware if necessary.",
-            "Stable": "POS terminals functioning well. Maintain current support levels."
-        },
-        "Mobile App": {
-            "Critical": "App experiencing critical issues. Roll back recent updates and investigate server capacity.",
-            "Warning": "Address app performance concerns. Conduct user testing and optimize load times.",
-            "Stable": "Mobile app performance is satisfactory. Continue feature enhancements."
-        },
-        "Online Banking": {
-            "Critical": "Critical online banking issues. Check server status and security protocols immediately.",
-            "Warning": "Improve online banking user experience. Address login and navigation issues.",
-            "Stable": "Online banking service running smoothly. Monitor for security threats."
-        },
-        "Customer Service": {
-            "Critical": "Immediate customer service improvements needed. Increase staffing and conduct training.",
-            "Warning": "Enhance customer service processes. Reduce wait times and improve staff responsiveness.",
-            "Stable": "Customer service performing well. Maintain current service quality."
-        },
-        "Loan Services": {
-            "Critical": "Critical issues in loan processing. Streamline approval process and fix system bugs.",
-            "Warning": "Improve loan application processing times. Clarify documentation requirements.",
-            "Stable": "Loan services meeting expectations. Continue efficient processing."
-        }
-    }
+    # Specific recommendation by (product, risk level), else the risk level default
+    keys = pd.DataFrame({
+        '_product': risk_df[product_col].to_numpy(),
+        'Risk Level': risk_df['Risk Level'].to_numpy() if 'Risk Level' in risk_df.columns else 'Stable'
+    })
+    resolved = keys.merge(RECOMMENDATION_TABLE, on=['_product', 'Risk Level'], how='left')
+    resolved = resolved.merge(DEFAULT_TABLE, on='Risk Level', how='left')
+    recommendation = resolved['_specific'].fillna(resolved['_default']).fillna(FALLBACK_RECOMMENDATION)
     
-    def extract_top_issues(keywords_str):
-        """Extract top 3 most mentioned keywords"""
-        if pd.isna(keywords_str) or not keywords_str:
-            return "No specific issues identified"
-        
-        # Split and count keywords
-        keywords = [k.strip() for k in str(keywords_str).split(',') if k.strip()]
-        if not keywords:
-            return "General feedback"
-        
-        # Simple frequency count
-        keyword_freq = {}
-        for kw in keywords:
-            keyword_freq[kw] = keyword_freq.get(kw, 0) + 1
-        
-        # Get top 3
-        top_keywords = sorted(keyword_freq.items(), key=lambda x: x[1], reverse=True)[:3]
-        top_issue_text = ", ".join([k for k, v in top_keywords])
-        
-        return top_issue_text if top_issue_text else "General concerns"
-    
-    def get_recommendation(row):
-        feedback_type = row.get('Feedback Type', 'Unknown')
-        risk_level = row.get('Risk Level', 'Stable')
-        keywords = row.get('Keywords', '')
-        
-        # Get specific recommendation
-        if feedback_type in specific_recs and risk_level in specific_recs[feedback_type]:
-            rec = specific_recs[feedback_type][risk_level]
-        else:
-            rec = recommendations.get(risk_level, {}).get('default', 
-                                                           'Monitor situation and take appropriate action.')
-        
-        # Extract top issues
-        top_issue = extract_top_issues(keywords)
-        
-        return pd.Series([top_issue, rec])
+    # Top issues from real keyword counts
+    count_cols = [KEYWORD_COUNT_PREFIX + w for w in TRIGGER_WORDS]
+    if all(col in risk_df.columns for col in count_cols):
+        counts = risk_df[count_cols].to_numpy()
+    else:
+        counts = _keyword_string_counts(risk_df.get('Keywords', pd.Series('', index=risk_df.index)))
+    issues = np.array(top_issues(counts), dtype=object)
+    issues[issues == ""] = "No specific issues identified"
     
-    risk_df[['Top Issue Summary', 'Recommendation']] = risk_df.apply(get_recommendation, axis=1)
+    risk_df['Top Issue Summary'] = pd.Categorical(issues)
+    risk_df['Recommendation'] = pd.Categorical(recommendation.to_numpy())
     
     print("Recommendations generated.")
     return risk_df
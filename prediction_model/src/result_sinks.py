@@ -0,0 +1,179 @@
+import json
+import os
+import sqlite3
+import tempfile
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+from export_results import build_output_frame
+
+# Result stores for consumers that should not open the workbook (data directory, sibling to src)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, "data", "results")
+
+
+def parse_sink_names(text):
+    """'Parquet, sqlite' -> ['parquet', 'sqlite'] (names are case-insensitive)."""
+    return [s.strip().lower() for s in (text or "").split(",") if s.strip()]
+
+
+# Sinks written on every run besides Excel, e.g. PREDICTION_MODEL_RESULT_SINKS=parquet,sqlite,json
+DEFAULT_SINKS = parse_sink_names(os.environ.get("PREDICTION_MODEL_RESULT_SINKS"))
+
+# Sink column order: run timestamp and source workbook, then the Output sheet columns in snake_case
+SINK_COLUMNS = [
+    "run_ts", "source_workbook", "product", "feedback_type", "period", "average_rating", "sentiment_score",
+    "risk_level", "trend", "top_issue_summary", "recommendation", "probability_score",
+    "posterior_mean", "credible_lower", "credible_upper"
+]
+
+# Column types of the SQLite table
+FLOAT_COLUMNS = [
+    "average_rating", "sentiment_score", "probability_score", "posterior_mean", "credible_lower", "credible_upper"
+]
+SQLITE_TYPES = {col: "REAL" if col in FLOAT_COLUMNS else "TEXT" for col in SINK_COLUMNS}
+SQLITE_TYPES["run_ts"] = "TEXT NOT NULL"
+
+
+def sink_frame(df, run_ts, source=None):
+    """
+    The exported results as stored by the sinks: the Output sheet columns
+    (see export_results.build_output_frame) in snake_case, one fixed schema for
+    product and segment tables, labels as plain strings. `source` is the
+    workbook the results came from, or one workbook per row (batch runs).
+    """
+    output_df = build_output_frame(df).drop(columns=['Last Updated'])
+    output_df.columns = [c.lower().replace(" ", "_") for c in output_df.columns]
+    output_df.insert(0, "run_ts", run_ts)
+    output_df.insert(1, "source_workbook", source if isinstance(source, str) or source is None else list(source))
+    output_df = output_df.reindex(columns=SINK_COLUMNS)
+
+    for col in ["source_workbook", "product", "feedback_type", "risk_level", "trend", "top_issue_summary", "recommendation"]:
+        values = output_df[col].astype(object)
+        output_df[col] = values.where(values.isna(), values.astype(str)).astype("string")
+    output_df["period"] = pd.to_datetime(output_df["period"], errors="coerce")
+    for col in FLOAT_COLUMNS:
+        output_df[col] = pd.to_numeric(output_df[col], errors="coerce").astype("float64")
+    return output_df.reset_index(drop=True)
+
+
+class ParquetSink:
+    """
+    Append-only Parquet dataset: one new file per run under
+    <root>/<table>/run_date=YYYY-MM-DD/. Read back with pd.read_parquet(<root>/<table>).
+    """
+
+    def __init__(self, root=RESULTS_DIR):
+        self.root = root
+
+    def write(self, frame, table):
+        run_date = frame["run_ts"].iloc[0][:10]
+        folder = os.path.join(self.root, table, f"run_date={run_date}")
+        os.makedirs(folder, exist_ok=True)
+        # Written under a temporary name so readers never see a partial file
+        name = f"part-{frame['run_ts'].iloc[0].replace(':', '')}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp = os.path.join(folder, "." + name)
+        frame.to_parquet(tmp, index=False)
+        os.replace(tmp, os.path.join(folder, name))
+        return os.path.join(folder, name)
+
+
+class SQLiteSink:
+    """One row per result and run in a SQLite table, indexed on (run_ts, feedback_type)."""
+
+    def __init__(self, path=os.path.join(RESULTS_DIR, "results.db")):
+        self.path = path
+
+    def write(self, frame, table):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                + ", ".join(f"{col} {SQLITE_TYPES[col]}" for col in SINK_COLUMNS) + ")"
+            )
+            # Tables created before a column was added get it appended (older rows hold NULL)
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for col in SINK_COLUMNS:
+                if col not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} {SQLITE_TYPES[col]}")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_run_feedback ON {table} (run_ts, feedback_type)")
+            rows = frame.astype(object).where(frame.notna(), None)
+            rows["period"] = [p.isoformat() if p is not None else None for p in rows["period"]]
+            conn.executemany(
+                f"INSERT INTO {table} ({', '.join(SINK_COLUMNS)}) VALUES ({', '.join('?' * len(SINK_COLUMNS))})",
+                rows[SINK_COLUMNS].itertuples(index=False, name=None)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return self.path
+
+
+class JsonSnapshotSink:
+    """
+    Latest results only, as <root>/<table>_latest.json. The file is replaced
+    atomically, so readers always see either the previous or the new run.
+    """
+
+    def __init__(self, root=RESULTS_DIR):
+        self.root = root
+
+    def write(self, frame, table):
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, f"{table}_latest.json")
+        snapshot = {
+            "run_ts": frame["run_ts"].iloc[0],
+            "table": table,
+            "results": json.loads(frame.drop(columns=["run_ts"]).to_json(orient="records", date_format="iso"))
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=f".{table}_", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(snapshot, f, indent=2)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return path
+
+
+RESULT_SINKS = {
+    "parquet": ParquetSink,
+    "sqlite": SQLiteSink,
+    "json": JsonSnapshotSink
+}
+
+
+def write_result_sinks(df, sinks=None, table="output", run_ts=None, source=None):
+    """
+    Writes the results to each sink in `sinks` (names from RESULT_SINKS or sink
+    instances; default DEFAULT_SINKS). A failing sink is reported and skipped.
+    `source` is stored as 'source_workbook' (see sink_frame).
+
+    Returns:
+        dict: Sink name -> written location, for the sinks that succeeded.
+    """
+    sinks = DEFAULT_SINKS if sinks is None else sinks
+    if df.empty or not sinks:
+        return {}
+
+    run_ts = run_ts or datetime.now().isoformat(timespec="seconds")
+    frame = sink_frame(df, run_ts, source)
+    written = {}
+    for sink in sinks:
+        name = sink.lower() if isinstance(sink, str) else type(sink).__name__
+        try:
+            if isinstance(sink, str):
+                if name not in RESULT_SINKS:
+                    raise ValueError(f"Unknown result sink '{sink}'. Choose from {list(RESULT_SINKS)}.")
+                sink = RESULT_SINKS[name]()
+            written[name] = sink.write(frame, table)
+            print(f"[SUCCESS] Results written to {name}: {written[name]}")
+        except Exception as e:
+            print(f"[WARNING] Could not write results to {name}: {e}")
+    return written
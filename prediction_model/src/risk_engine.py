@@ -1,11 +1,114 @@
+import json
+import operator
+import os
+import numpy as np
 import pandas as pd
+from schema import widen
 
-def assess_risk(prob_df):
+# Use absolute path relative to this file to avoid CWD issues
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RULES_FILE = os.path.join(BASE_DIR, "risk_rules.json")
+
+# Risk rules, checked in order; the first level whose conditions hold wins.
+# "any" is a list of alternatives, each a list of clauses that must all hold.
+# - Critical: Extremely low rating (1-2 stars)
+#   OR Significant conflict: OK rating (3) but Terrible Sentiment (0.8+)
+#   OR a live negative-sentiment spike (spike_detector)
+# - Warning: Mediocre rating (3 stars) OR Mildly negative sentiment (0.4 - 0.7) even with good stars
+# - Stable: Good rating (4-5) AND Low negative sentiment (< 0.4)
+DEFAULT_RISK_RULES = {
+    "rules": [
+        {
+            "level": "Critical",
+            "any": [
+                [{"metric": "rating", "op": "<=", "value": 2.5}],
+                [{"metric": "rating", "op": "<=", "value": 3.5}, {"metric": "neg_prob", "op": ">", "value": 0.8}],
+                [{"metric": "spike_alert", "op": "==", "value": 1}]
+            ]
+        },
+        {
+            "level": "Warning",
+            "any": [
+                [{"metric": "rating", "op": "<", "value": 4.0}],
+                [{"metric": "neg_prob", "op": ">", "value": 0.4}]
+            ]
+        }
+    ],
+    "default": "Stable"
+}
+
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq
+}
+
+# Metric -> candidate columns (aggregated tables first, then record-level tables) and
+# the value used when the table has none of them
+METRIC_COLUMNS = {
+    "rating": (["Average Rating", "Rating"], 5),
+    # BERT Sentiment is "Probability of Negativity" (0.0 = Positive/Neutral, 1.0 = Highly Negative)
+    "neg_prob": (["Average Sentiment Score", "Sentiment Score"], 0),
+    # 1 while spike_detector has a live alert for the product
+    "spike_alert": (["Spike Alert"], 0)
+}
+
+def load_risk_rules(path=RULES_FILE):
+    if not os.path.exists(path):
+        return DEFAULT_RISK_RULES
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Warning: Could not load risk rules ({e}). Using defaults.")
+        return DEFAULT_RISK_RULES
+
+def _metric_values(df, metric):
+    columns, default = METRIC_COLUMNS[metric]
+    for col in columns:
+        if col in df.columns:
+            # Rounded, so float32 storage noise cannot push a value across a threshold
+            return widen(df[col])
+    return np.full(len(df), default, dtype=float)
+
+def classify_risk(df, rules=None):
+    """
+    Evaluates the risk rule table over whole columns (no per-row Python calls).
+    Works on product, segment or record-level tables.
+    
+    Args:
+        df (pd.DataFrame): Table with rating and sentiment columns (see METRIC_COLUMNS).
+        rules (dict): Rule table; defaults to load_risk_rules().
+        
+    Returns:
+        np.ndarray: Risk level per row.
+    """
+    rules = rules or load_risk_rules()
+    metrics = {m: _metric_values(df, m) for m in METRIC_COLUMNS}
+
+    conditions, levels = [], []
+    for rule in rules["rules"]:
+        hit = np.zeros(len(df), dtype=bool)
+        for clauses in rule["any"]:
+            mask = np.ones(len(df), dtype=bool)
+            for clause in clauses:
+                mask &= OPERATORS[clause["op"]](metrics[clause["metric"]], clause["value"])
+            hit |= mask
+        conditions.append(hit)
+        levels.append(rule["level"])
+
+    return np.select(conditions, levels, default=rules.get("default", "Stable")).astype(object)
+
+def assess_risk(prob_df, rules=None):
     """
     Assess risk level based on Average Rating and Sentiment Score.
     
     Args:
-        prob_df (pd.DataFrame): DataFrame with 'Average Rating' and 'Average Sentiment Score'.
+        prob_df (pd.DataFrame): DataFrame with 'Average Rating' and 'Average Sentiment Score'
+            (or record-level 'Rating' and 'Sentiment Score').
+        rules (dict): Rule table; defaults to risk_rules.json.
         
     Returns:
         pd.DataFrame: DataFrame with 'Risk Level' column added.
@@ -15,35 +118,7 @@ def assess_risk(prob_df):
     
     print("Assessing risk levels...")
     
-    def get_risk_level(row):
-        """
-        Determine risk level based on:
-        - Critical: Avg Rating <= 2 OR Very High Negative Sentiment (> 0.7)
-        - Warning: Avg Rating < 4 OR Moderate Negative Sentiment (> 0.4)
-        - Stable: High Rating (>= 4) AND Low Negative Sentiment (<= 0.4)
-        """
-        rating = row.get('Average Rating', 5)
-        # BERT Sentiment is "Probability of Negativity" (0.0 = Positive/Neutral, 1.0 = Highly Negative)
-        neg_prob = row.get('Average Sentiment Score', 0)
-        
-        # 1. Critical Logic
-        # - Extremely low rating (1-2 stars)
-        # - OR Significant conflict: OK rating (3) but Terrible Sentiment (0.8+)
-        if rating <= 2.5 or (rating <= 3.5 and neg_prob > 0.8):
-            return "Critical"
-        
-        # 2. Warning Logic
-        # - Mediocre rating (3 stars)
-        # - OR Mildly negative sentiment (0.4 - 0.7) even with good stars
-        if rating < 4.0 or neg_prob > 0.4:
-            return "Warning"
-            
-        # 3. Stable Logic
-        # - Good rating (4-5) AND Low negative sentiment (< 0.4)
-        return "Stable"
-    
-    prob_df['Risk Level'] = prob_df.apply(get_risk_level, axis=1)
+    prob_df['Risk Level'] = pd.Categorical(classify_risk(prob_df, rules))
     
     print("Risk assessment complete.")
     return prob_df
-
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    TEXT_DTYPE = pd.StringDtype("python")
+
+# Column dtypes of the row-level frames (load_data -> nlp_engine -> risk/recommendations).
+# Labels repeat across many rows, so they are stored once as categories.
+SCHEMA = {
+    'Date': 'datetime',
+    'Product': 'category',
+    'Feedback Type': 'category',
+    'Status': 'category',
+    'Rating': 'float32',
+    'Comment': 'text',
+    'Sentiment Score': 'float32',
+    'Keywords': 'category',
+    'Risk Level': 'category',
+    'Top Issue Summary': 'category',
+    'Recommendation': 'category'
+}
+
+# float32 keeps ~7 significant digits; values are rounded back to this many
+# decimals when widened, so 0.8 stored as 0.800000011920929 compares as 0.8
+FLOAT32_DECIMALS = 6
+
+
+def _cast(series, kind):
+    if kind == 'datetime':
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        return pd.to_datetime(series, errors='coerce')
+    if kind == 'category':
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return series
+        # Labels are text; numbers typed into a label column become their string form
+        return series.where(series.isna(), series.astype(str)).astype('category')
+    if kind == 'float32':
+        return pd.to_numeric(series, errors='coerce').astype(np.float32)
+    if kind == 'text':
+        return series.where(series.isna(), series.astype(str)).astype(TEXT_DTYPE)
+    return series
+
+
+def widen(values):
+    """
+    float64 copy of a (possibly float32) numeric column for aggregation and
+    threshold checks. Non-numeric values become NaN.
+
+    Returns:
+        np.ndarray: The values as float64, rounded to FLOAT32_DECIMALS.
+    """
+    values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.round(values, FLOAT32_DECIMALS)
+
+
+def apply_schema(df):
+    """
+    Casts the columns of `df` that appear in SCHEMA to their compact dtype.
+    Other columns are left as they are; values that do not parse become missing.
+
+    Returns:
+        pd.DataFrame: `df` with the cast columns (modified in place and returned).
+    """
+    for column, kind in SCHEMA.items():
+        if column in df.columns:
+            df[column] = _cast(df[column], kind)
+    return df
+
+
+def memory_report(df):
+    """
+    Returns:
+        pd.DataFrame: Per column dtype and resident bytes (deep), largest first,
+        with a 'Total' row.
+    """
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'dtype': df.dtypes.astype(str),
+        'bytes': usage
+    }).sort_values('bytes', ascending=False)
+    report.loc['Total'] = ['', int(usage.sum())]
+    return report
@@ -0,0 +1,170 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Store the cache in the data directory (sibling to src), next to history.csv
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_FILE = os.path.join(BASE_DIR, "data", "sentiment_cache.db")
+DEFAULT_MAX_ENTRIES = 500_000
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+
+def normalize_text(text):
+    """
+    Normalizes a comment for cache keying.
+    The sentiment model is uncased and splits on whitespace, so case and
+    whitespace differences do not change its output.
+    """
+    return " ".join(str(text).split()).lower()
+
+
+def make_key(text, model_name, backend):
+    """Content-addressed key: hash of the normalized text plus model name and backend."""
+    payload = f"{model_name}\x1f{backend}\x1f{normalize_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+    """
+    Persistent, size-bounded LRU cache of negative-sentiment probabilities backed by SQLite.
+
+    Args:
+        path (str): SQLite file. Defaults to data/sentiment_cache.db.
+        max_entries (int): Least recently used rows are evicted above this size.
+    """
+
+    def __init__(self, path=CACHE_FILE, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sentiment_cache ("
+            " key TEXT PRIMARY KEY,"
+            " prob REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sentiment_cache_last_used ON sentiment_cache (last_used)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys):
+        """
+        Looks up `keys` and refreshes their LRU timestamp.
+
+        Returns:
+            dict: key -> probability for the keys that were found.
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(unique_keys), _QUERY_CHUNK):
+                chunk = unique_keys[start:start + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, prob FROM sentiment_cache WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE sentiment_cache SET last_used = ? WHERE key = ?",
+                    [(now, k) for k in found]
+                )
+                self._conn.commit()
+
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, items):
+        """Stores (key, probability) pairs and evicts the least recently used rows above max_entries."""
+        items = list(items)
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sentiment_cache (key, prob, last_used) VALUES (?, ?, ?)",
+                [(k, float(p), now) for k, p in items]
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM sentiment_cache WHERE key IN ("
+                " SELECT key FROM sentiment_cache ORDER BY last_used ASC LIMIT ?)",
+                (overflow,)
+            )
+
+    def stats(self):
+        """Returns hit/miss counters for this process and the current number of cached rows."""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "entries": size,
+            "max_entries": self.max_entries
+        }
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM sentiment_cache")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """
+    Returns the process-wide cache at CACHE_FILE, or None if it cannot be opened
+    (e.g. read-only data directory). Scoring still works without it.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                try:
+                    _default_cache = SentimentCache()
+                except Exception as e:
+                    print(f"[WARNING] Sentiment cache unavailable ({e}). Scoring without cache.")
+                    _default_cache = False
+    return _default_cache or None
+
+
+def reset_default_cache():
+    """
+    Forgets the process-wide cache without closing it, so the next
+    get_default_cache() opens a new connection. For worker processes, where a
+    connection inherited from the parent must not be used (or closed).
+    """
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = None
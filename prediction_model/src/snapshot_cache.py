@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import tempfile
+
+try:
+    import pyarrow.feather as feather
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+# Store snapshots in the data directory (sibling to src)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_DIR = os.path.join(BASE_DIR, "data", "snapshots")
+
+_HASH_BLOCK = 1 << 20
+
+
+def file_hash(path):
+    """SHA-256 of the file contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _snapshot_paths(path, sheet_name, snapshot_dir):
+    name = hashlib.sha256(f"{os.path.abspath(path)}\x1f{sheet_name}".encode("utf-8")).hexdigest()[:24]
+    base = os.path.join(snapshot_dir, name)
+    return base + ".feather", base + ".json"
+
+
+def _replace_file(target, write):
+    """Calls write(tmp) on a temporary file next to `target`, then moves it over `target` atomically."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".snapshot_")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, target)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _write_meta(meta, meta_file):
+    def write(tmp):
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+    _replace_file(meta_file, write)
+
+
+def load_snapshot(path, sheet_name, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Returns the cached canonical DataFrame for `path`/`sheet_name`, or None if
+    there is no snapshot or the workbook changed since it was written.
+
+    Size and mtime are checked first; if only the mtime moved (file re-saved
+    without changes) the content hash decides and the snapshot is kept.
+    The Feather file is uncompressed and memory-mapped.
+    """
+    if not ARROW_AVAILABLE:
+        return None
+    data_file, meta_file = _snapshot_paths(path, sheet_name, snapshot_dir)
+    if not (os.path.exists(data_file) and os.path.exists(meta_file)):
+        return None
+
+    try:
+        with open(meta_file, "r") as f:
+            meta = json.load(f)
+        stat = os.stat(path)
+        if stat.st_size != meta["size"]:
+            return None
+        if stat.st_mtime_ns != meta["mtime_ns"]:
+            if file_hash(path) != meta["content_hash"]:
+                return None
+            meta["mtime_ns"] = stat.st_mtime_ns
+            _write_meta(meta, meta_file)
+
+        return feather.read_table(data_file, memory_map=True).to_pandas()
+    except Exception as e:
+        print(f"[WARNING] Could not read snapshot ({e}). Re-parsing workbook.")
+        return None
+
+
+def save_snapshot(path, sheet_name, df, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Writes `df` as the snapshot of `path`/`sheet_name`, replacing any stale one.
+
+    Both files are written under temporary names and moved into place, so a
+    reader (possibly memory-mapping the old Feather file) never sees a partial
+    file. The metadata is dropped first and written last, so new data is never
+    paired with old metadata.
+    """
+    if not ARROW_AVAILABLE:
+        return
+    data_file, meta_file = _snapshot_paths(path, sheet_name, snapshot_dir)
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        stat = os.stat(path)
+        meta = {
+            "path": os.path.abspath(path),
+            "sheet": sheet_name,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "content_hash": file_hash(path)
+        }
+        if os.path.exists(meta_file):
+            os.remove(meta_file)
+        frame = df.reset_index(drop=True)
+        _replace_file(data_file, lambda tmp: feather.write_feather(frame, tmp, compression="uncompressed"))
+        _write_meta(meta, meta_file)
+    except Exception as e:
+        print(f"[WARNING] Could not write snapshot ({e}). Continuing without it.")
+        for stale in (data_file, meta_file):
+            if os.path.exists(stale):
+                os.remove(stale)
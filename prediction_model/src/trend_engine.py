@@ -0,0 +1,206 @@
+import json
+import math
+import os
+from collections import deque
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Store trend state in data directory (sibling to src), next to history.csv
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TREND_FILE = os.path.join(BASE_DIR, "data", "trend_state.json")
+HISTORY_FILE = os.path.join(BASE_DIR, "data", "history.csv")
+
+# Rolling windows in seconds
+WINDOWS = {"1h": 3600, "24h": 24 * 3600, "7d": 7 * 24 * 3600}
+
+# Time-decayed EWMA: an observation loses half its weight after this many seconds
+EWMA_HALFLIFE = 24 * 3600
+
+# EWMA vs 7d mean of the probability beyond which a product is rising/falling
+TREND_THRESHOLD = 0.05
+
+# Tracked metric -> (column in the results table, column in history.csv, output label)
+METRICS = {
+    "prob": ("Probability Score", "final_prob", "Prob"),
+    "rating": ("Average Rating", "rating", "Rating")
+}
+
+
+class RollingWindow:
+    """Time-based window with running sum/count; each add evicts expired points (amortized O(1))."""
+
+    def __init__(self, seconds, points=()):
+        self.seconds = seconds
+        self.points = deque()
+        self.total = 0.0
+        for ts, value in points:
+            self.add(ts, value)
+
+    def add(self, ts, value):
+        self.points.append((ts, value))
+        self.total += value
+        self.evict(ts)
+
+    def evict(self, now):
+        while self.points and self.points[0][0] <= now - self.seconds:
+            _, value = self.points.popleft()
+            self.total -= value
+
+    def mean(self):
+        return self.total / len(self.points) if self.points else np.nan
+
+
+class ProductTrend:
+    """EWMA and rolling windows of each metric for one product."""
+
+    def __init__(self):
+        self.last_ts = None
+        self.ewma = {m: None for m in METRICS}
+        self.windows = {m: {name: RollingWindow(sec) for name, sec in WINDOWS.items()} for m in METRICS}
+
+    def update(self, ts, values):
+        # Weight of the new point grows with the time since the previous one
+        dt = 0.0 if self.last_ts is None else max(0.0, ts - self.last_ts)
+        alpha = 1 - math.exp(-math.log(2) * dt / EWMA_HALFLIFE)
+        self.last_ts = ts if self.last_ts is None else max(ts, self.last_ts)
+
+        for metric, value in values.items():
+            if value is None or pd.isna(value):
+                continue
+            value = float(value)
+            prev = self.ewma[metric]
+            self.ewma[metric] = value if prev is None else prev + alpha * (value - prev)
+            for window in self.windows[metric].values():
+                window.add(ts, value)
+
+    def trend(self):
+        ewma = self.ewma["prob"]
+        week = self.windows["prob"]["7d"].mean()
+        if ewma is None or np.isnan(week):
+            return "trend: stable"
+        if ewma - week > TREND_THRESHOLD:
+            return "trend: rising"
+        if week - ewma > TREND_THRESHOLD:
+            return "trend: falling"
+        return "trend: stable"
+
+
+class TrendEngine:
+    """
+    Per-product EWMA and rolling 1h/24h/7d means of the Probability Score and
+    Average Rating. State is updated once per logged run and persisted as JSON,
+    so trends never require rescanning history.csv.
+    """
+
+    def __init__(self):
+        self.products = {}
+
+    def update(self, product, ts, values):
+        """Adds one observation (`values`: metric -> value) for `product` at epoch seconds `ts`."""
+        self.products.setdefault(product, ProductTrend()).update(ts, values)
+
+    def update_from_results(self, final_df, ts=None, product_col='Feedback Type'):
+        """Adds one observation per product row of a model run."""
+        ts = datetime.now().timestamp() if ts is None else ts
+        columns = {m: col for m, (col, _, _) in METRICS.items() if col in final_df.columns}
+        for row in final_df[[product_col] + list(columns.values())].itertuples(index=False):
+            self.update(row[0], ts, dict(zip(columns, row[1:])))
+        return self
+
+    def to_frame(self, product_col='Feedback Type'):
+        """
+        Returns:
+            pd.DataFrame: One row per product with '<Metric> EWMA', '<Metric> <window> Mean'
+            and a 'Trend' label ("trend: rising" / "trend: falling" / "trend: stable").
+        """
+        rows = []
+        for product, state in self.products.items():
+            row = {product_col: product}
+            for metric, (_, _, label) in METRICS.items():
+                row[f"{label} EWMA"] = state.ewma[metric]
+                for name, window in state.windows[metric].items():
+                    window.evict(state.last_ts)
+                    row[f"{label} {name} Mean"] = window.mean()
+            row["Trend"] = state.trend()
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def save(self, path=TREND_FILE):
+        state = {
+            product: {
+                "last_ts": trend.last_ts,
+                "ewma": trend.ewma,
+                "windows": {
+                    m: {name: list(w.points) for name, w in windows.items()}
+                    for m, windows in trend.windows.items()
+                }
+            }
+            for product, trend in self.products.items()
+        }
+        try:
+            with open(path, "w") as f:
+                json.dump(state, f)
+        except Exception as e:
+            print(f"Error saving trend state: {e}")
+
+    @classmethod
+    def load(cls, path=TREND_FILE, history_path=HISTORY_FILE):
+        """
+        Restores the saved state. On first use (no state file) the engine is
+        bootstrapped once by replaying history.csv.
+        """
+        if not os.path.exists(path):
+            return cls.from_history(history_path)
+
+        engine = cls()
+        try:
+            with open(path, "r") as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load trend state ({e}). Rebuilding from history.")
+            return cls.from_history(history_path)
+
+        for product, saved in state.items():
+            trend = ProductTrend()
+            trend.last_ts = saved["last_ts"]
+            trend.ewma = saved["ewma"]
+            trend.windows = {
+                m: {name: RollingWindow(WINDOWS[name], points) for name, points in windows.items()}
+                for m, windows in saved["windows"].items()
+            }
+            engine.products[product] = trend
+        return engine
+
+    @classmethod
+    def from_history(cls, history_path=HISTORY_FILE):
+        engine = cls()
+        if not os.path.exists(history_path):
+            return engine
+        try:
+            history = pd.read_csv(history_path)
+        except Exception as e:
+            print(f"Warning: Could not read history ({e}). Starting trends from scratch.")
+            return engine
+
+        history['date'] = pd.to_datetime(history['date'], errors='coerce')
+        history = history.dropna(subset=['date']).sort_values('date')
+        for m, (_, col, _) in METRICS.items():
+            history[col] = pd.to_numeric(history[col], errors='coerce')
+
+        timestamps = history['date'].map(lambda d: d.timestamp())
+        hist_cols = {m: col for m, (_, col, _) in METRICS.items()}
+        for ts, row in zip(timestamps, history[['feedback_type'] + list(hist_cols.values())].itertuples(index=False)):
+            engine.update(row[0], ts, dict(zip(hist_cols, row[1:])))
+        return engine
+
+
+def apply_trends(final_df, product_col='Feedback Type'):
+    """
+    Records this run's results in the persisted trend state and returns
+    `final_df` with the trend columns joined on.
+    """
+    engine = TrendEngine.load()
+    engine.update_from_results(final_df, product_col=product_col)
+    engine.save()
+    return final_df.merge(engine.to_frame(product_col), on=product_col, how='left')
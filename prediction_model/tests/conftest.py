@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Tests never download or load the sentiment model
+os.environ.setdefault("PREDICTION_MODEL_DISABLE_BERT", "1")
+
+# The modules import each other from src/ (as main.py does via sys.path)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
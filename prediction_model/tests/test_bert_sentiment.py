@@ -0,0 +1,72 @@
+import os
+import sqlite3
+import sys
+import types
+
+import numpy as np
+import pytest
+
+import bert_sentiment
+
+
+class _FailingCache:
+    def get_many(self, keys):
+        return {}
+
+    def put_many(self, items):
+        list(items)
+        raise sqlite3.OperationalError("database is locked")
+
+
+def test_cache_write_failure_keeps_bert_scores(monkeypatch):
+    monkeypatch.setattr(bert_sentiment, "BERT_DISABLED", False)
+    monkeypatch.setattr(bert_sentiment, "get_default_cache", lambda: _FailingCache())
+    monkeypatch.setattr(bert_sentiment, "_ensure_bert_loaded", lambda: True)
+    monkeypatch.setattr(
+        bert_sentiment, "_bert_negative_probabilities",
+        lambda texts, batch_size: np.full(len(texts), 0.9731)
+    )
+
+    probs = bert_sentiment.get_negative_probabilities(["the app is great", "", "terrible service"])
+
+    # Not the keyword fallback (0.2 / 0.8); missing comments stay neutral
+    assert probs.tolist() == [0.9731, 0.5, 0.9731]
+
+
+def test_onnx_path_is_keyed_by_model_and_precision():
+    assert bert_sentiment.onnx_model_path("org/model-a") != bert_sentiment.onnx_model_path("org/model-b")
+    assert bert_sentiment.onnx_model_path(precision="fp32") != bert_sentiment.onnx_model_path(precision="int8")
+    assert os.path.dirname(bert_sentiment.onnx_model_path("org/model")) == bert_sentiment.ONNX_DIR
+
+
+class _FakeModel:
+    config = types.SimpleNamespace(return_dict=True)
+
+
+def _fake_torch(export):
+    return types.SimpleNamespace(onnx=types.SimpleNamespace(export=export))
+
+
+def test_failed_onnx_export_leaves_no_file(monkeypatch, tmp_path):
+    def export(model, inputs, path, **kwargs):
+        with open(path, "wb") as f:
+            f.write(b"partial")
+        raise RuntimeError("export failed")
+
+    monkeypatch.setitem(sys.modules, "torch", _fake_torch(export))
+    path = str(tmp_path / "model.onnx")
+    with pytest.raises(RuntimeError):
+        bert_sentiment._export_onnx(_FakeModel(), lambda texts, return_tensors: {"input_ids": 0, "attention_mask": 0}, path)
+    assert os.listdir(tmp_path) == []
+
+
+def test_onnx_export_is_moved_into_place(monkeypatch, tmp_path):
+    def export(model, inputs, path, **kwargs):
+        assert not os.path.exists(tmp_path / "model.onnx")
+        with open(path, "wb") as f:
+            f.write(b"model")
+
+    monkeypatch.setitem(sys.modules, "torch", _fake_torch(export))
+    path = str(tmp_path / "model.onnx")
+    bert_sentiment._export_onnx(_FakeModel(), lambda texts, return_tensors: {"input_ids": 0, "attention_mask": 0}, path)
+    assert os.listdir(tmp_path) == ["model.onnx"]
@@ -0,0 +1,180 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from export_results import (
+    MIN_TABLE_WIDTH, _ExportSession, _write_table, build_output_frame, changed_bounds, open_export_session,
+    openpyxl_unsupported
+)
+
+
+class FakeSheet:
+    """In-memory sheet with the exporter's sheet operations; records every write."""
+
+    def __init__(self):
+        self.cells = {}
+        self.writes = []
+
+    def last_row(self):
+        return max([r for r, _ in self.cells] + [1])
+
+    def read(self, r0, c0, r1, c1):
+        return [[self.cells.get((r, c)) for c in range(c0, c1 + 1)] for r in range(r0, r1 + 1)]
+
+    def write(self, row, col, block):
+        self.writes.append((row, col, len(block), len(block[0])))
+        for i, values in enumerate(block):
+            for j, value in enumerate(values):
+                self.cells[(row + i, col + j)] = value
+
+    def clear(self, c0, c1):
+        self.cells = {k: v for k, v in self.cells.items() if not c0 <= k[1] <= c1}
+
+    def style_header(self, row, c0, c1):
+        pass
+
+    def autofit(self):
+        pass
+
+
+def _output(stamp, risks=('Critical', 'Stable', 'Warning')):
+    return pd.DataFrame({
+        'Feedback Type': ['ATM', 'App', 'Service'],
+        'Average Rating': [2.0, 4.5, 3.5],
+        'Sentiment Score': [0.91, 0.12, 0.45],
+        'Risk Level': list(risks),
+        'Last Updated': [stamp] * 3
+    })
+
+
+def test_changed_bounds():
+    previous = [['a', 'b', 'c'], [1, 2, 3]]
+    assert changed_bounds(previous, [['a', 'b', 'c'], [1, 2, 3]]) is None
+    assert changed_bounds(previous, [['a', 'b', 'c'], [1, 5, 3]]) == (1, 1, 1, 1)
+    # A shorter table blanks the rows past its end
+    assert changed_bounds(previous, [['a', 'b', 'c']]) == (1, 1, 0, 2)
+
+
+def test_unchanged_results_write_nothing():
+    sheet = FakeSheet()
+    _write_table(sheet, _output('2026-01-01 09:00:00'))
+    assert sheet.writes == [(1, 1, 4, MIN_TABLE_WIDTH)]
+
+    # A later run with the same results only differs in its timestamp
+    sheet.writes.clear()
+    _write_table(sheet, _output('2026-01-01 10:00:00'))
+    assert sheet.writes == []
+    assert sheet.cells[(2, 5)] == '2026-01-01 09:00:00'
+
+
+def test_only_changed_rows_are_written_and_restamped():
+    sheet = FakeSheet()
+    _write_table(sheet, _output('2026-01-01 09:00:00'))
+
+    sheet.writes.clear()
+    _write_table(sheet, _output('2026-01-01 10:00:00', risks=('Critical', 'Warning', 'Warning')))
+    # Row 3 (App): Risk Level through Last Updated
+    assert sheet.writes == [(3, 4, 1, 2)]
+    assert sheet.cells[(3, 4)] == 'Warning'
+    assert sheet.cells[(3, 5)] == '2026-01-01 10:00:00'
+    assert sheet.cells[(2, 5)] == sheet.cells[(4, 5)] == '2026-01-01 09:00:00'
+
+
+def test_shorter_table_blanks_old_rows():
+    sheet = FakeSheet()
+    _write_table(sheet, _output('2026-01-01 09:00:00'))
+    _write_table(sheet, _output('2026-01-01 09:00:00').iloc[:2])
+    assert all(sheet.cells.get((4, c)) is None for c in range(1, MIN_TABLE_WIDTH + 1))
+
+
+def test_float_read_back_in_last_digit_is_unchanged():
+    previous = [['Probability Score'], [0.4833333333333333]]
+    assert changed_bounds(previous, [['Probability Score'], [0.48333333333333334]]) is None
+    assert changed_bounds(previous, [['Probability Score'], [0.4834]]) == (1, 1, 0, 0)
+
+
+def test_openpyxl_round_trip(tmp_path):
+    path = str(tmp_path / "results.xlsx")
+    pd.DataFrame({'Date': ['4/25/2025'], 'Comments': ['ok']}).to_excel(path, sheet_name='Feedback_Data', index=False)
+    results = _output('2026-01-01 09:00:00').rename(columns={'Sentiment Score': 'Average Sentiment Score'})
+
+    with open_export_session(path, backend="openpyxl") as session:
+        session.write_table(results, 'Output')
+
+    openpyxl = pytest.importorskip("openpyxl")
+    ws = openpyxl.load_workbook(path)['Output']
+    rows = list(ws.iter_rows(min_row=1, max_row=4, max_col=4, values_only=True))
+    assert rows[0] == ('Feedback Type', 'Average Rating', 'Sentiment Score', 'Risk Level')
+    assert rows[1] == ('ATM', 2, 0.91, 'Critical')
+
+
+def test_openpyxl_refuses_bundled_template(tmp_path):
+    template = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "Feedback_Dashboard_Template.xlsm")
+    path = str(tmp_path / "template.xlsm")
+    shutil.copy(template, path)
+    with open(path, "rb") as f:
+        before = f.read()
+
+    assert openpyxl_unsupported(path) == ["form controls", "drawings and shapes"]
+    with pytest.raises(ValueError, match="xlwings backend"):
+        with open_export_session(path, backend="openpyxl") as session:
+            session.write_table(_output('2026-01-01 09:00:00'), 'Output')
+
+    # The workbook is left untouched
+    with open(path, "rb") as f:
+        assert f.read() == before
+
+
+def test_openpyxl_refuses_workbook_with_drawing(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    from openpyxl.chart import BarChart, Reference
+
+    path = str(tmp_path / "chart.xlsx")
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(['Rating'])
+    ws.append([3])
+    chart = BarChart()
+    chart.add_data(Reference(ws, min_col=1, min_row=1, max_row=2), titles_from_data=True)
+    ws.add_chart(chart, "C2")
+    wb.save(path)
+
+    assert openpyxl_unsupported(path) == ["drawings and shapes"]
+    with pytest.raises(ValueError, match="xlwings backend"):
+        with open_export_session(path, backend="openpyxl") as session:
+            session.write_table(_output('2026-01-01 09:00:00'), 'Output')
+
+
+def test_sessions_must_provide_sheets():
+    with pytest.raises(TypeError):
+        _ExportSession("book.xlsx")
+
+
+def test_openpyxl_unreadable_workbook_gives_clear_error(tmp_path):
+    path = str(tmp_path / "broken.xlsx")
+    with open(path, "wb") as f:
+        f.write(b"not a workbook")
+    with pytest.raises(ValueError, match="openpyxl cannot read"):
+        with open_export_session(path, backend="openpyxl"):
+            pass
+
+
+def test_output_frame_includes_posterior_columns():
+    scored = pd.DataFrame({
+        'Feedback Type': ['ATM'],
+        'Average Rating': [2.0],
+        'Average Sentiment Score': [0.9],
+        'Risk Level': ['Critical'],
+        'Probability Score': [0.85],
+        'Posterior Mean': [0.8],
+        'Credible Lower': [0.6],
+        'Credible Upper': [0.93],
+        'Rating Count': [4]
+    })
+    output = build_output_frame(scored)
+    assert list(output.columns) == [
+        'Feedback Type', 'Average Rating', 'Sentiment Score', 'Risk Level', 'Probability Score',
+        'Posterior Mean', 'Credible Lower', 'Credible Upper', 'Last Updated'
+    ]
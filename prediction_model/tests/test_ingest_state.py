@@ -0,0 +1,119 @@
+import pandas as pd
+import pytest
+
+from bayesian_model import SegmentAggregator, score_probabilities
+from ingest_state import IngestState, state_file_for
+from schema import apply_schema
+
+
+def _rows():
+    return apply_schema(pd.DataFrame({
+        'Date': pd.to_datetime(['2026-01-01 09:00', '2026-01-01 10:00', '2026-01-02 09:00']),
+        'Product': ['ATM', 'ATM', 'App'],
+        'Feedback Type': ['Complaint', 'Praise', 'Complaint'],
+        'Rating': [2.0, 5.0, 3.5],
+        'Sentiment Score': [0.9, 0.1, 0.55],
+        'Keywords': ['error, slow', '', 'crash']
+    }))
+
+
+def _assert_same_totals(left, right):
+    # Key columns come back as plain strings instead of categoricals
+    pd.testing.assert_frame_equal(left, right, check_dtype=False, check_categorical=False)
+
+
+def test_aggregator_save_load_round_trip(tmp_path):
+    aggregator = SegmentAggregator(['Product', 'Feedback Type'], 'D').add_rows(_rows())
+    aggregator.save(tmp_path / "aggregates.json")
+
+    restored = SegmentAggregator.load(tmp_path / "aggregates.json")
+    assert restored.keys == aggregator.keys
+    assert restored.time_bucket == 'D'
+    _assert_same_totals(restored.to_frame(), aggregator.to_frame())
+    _assert_same_totals(restored.to_frame(['Product']), aggregator.to_frame(['Product']))
+
+
+def test_state_round_trip(tmp_path):
+    state_file = tmp_path / "state.json"
+    state = IngestState(tmp_path / "book.xlsx", keys=['Product'])
+    state.watermark.rows, state.watermark.digest = 3, "abc"
+    state.aggregator.add_rows(_rows())
+    state.detector.update_frame(_rows())
+    state.save(state_file)
+
+    restored = IngestState.load(tmp_path / "book.xlsx", keys=['Product'], state_file=state_file)
+    assert (restored.watermark.rows, restored.watermark.digest) == (3, "abc")
+    _assert_same_totals(restored.aggregator.to_frame(), state.aggregator.to_frame())
+    assert {p: t.count for p, t in restored.detector.tests.items()} == {'ATM': 2, 'App': 1}
+
+
+def test_state_for_other_workbook_or_segmentation_starts_over(tmp_path):
+    state_file = tmp_path / "state.json"
+    state = IngestState(tmp_path / "book.xlsx")
+    state.watermark.rows = 3
+    state.aggregator.add_rows(_rows())
+    state.save(state_file)
+
+    for restored in [
+        IngestState.load(tmp_path / "other.xlsx", state_file=state_file),
+        IngestState.load(tmp_path / "book.xlsx", sheet_name="Other", state_file=state_file),
+        IngestState.load(tmp_path / "book.xlsx", keys=['Product', 'Feedback Type'], state_file=state_file),
+        IngestState.load(tmp_path / "book.xlsx", state_file=tmp_path / "missing.json")
+    ]:
+        assert restored.watermark.rows == 0
+        assert restored.aggregator.sums.empty
+
+
+def test_state_files_are_per_workbook(tmp_path):
+    assert state_file_for(tmp_path / "a" / "book.xlsx") != state_file_for(tmp_path / "b" / "book.xlsx")
+
+
+def test_incremental_updates_match_full_rebuild():
+    rows = _rows()
+    keys = ['Product', 'Feedback Type']
+    full = SegmentAggregator(keys, 'D').add_rows(rows.iloc[[0, 2]])
+
+    # Chunked add, then removal of a row that empties its segment
+    incremental = SegmentAggregator(keys, 'D').add_rows(rows.iloc[:1]).add_rows(rows.iloc[1:])
+    incremental.remove_rows(rows.iloc[[1]])
+
+    _assert_same_totals(incremental.to_frame(), full.to_frame())
+    _assert_same_totals(incremental.to_frame(['Product']), full.to_frame(['Product']))
+    _assert_same_totals(incremental.to_frame(['Feedback Type']), full.to_frame(['Feedback Type']))
+
+
+def test_edited_row_matches_full_rebuild():
+    rows = _rows()
+    edited = apply_schema(rows.assign(
+        Rating=[4.0, 5.0, 3.5], Keywords=['slow', '', 'crash']
+    ))
+
+    incremental = SegmentAggregator(['Product']).add_rows(rows)
+    incremental.remove_rows(rows.iloc[[0]]).add_rows(edited.iloc[[0]])
+
+    _assert_same_totals(incremental.to_frame(), SegmentAggregator(['Product']).add_rows(edited).to_frame())
+
+
+def test_empty_aggregator_gives_empty_tables():
+    aggregator = SegmentAggregator(['Product', 'Feedback Type'], 'D')
+    assert aggregator.to_frame().empty
+    assert list(aggregator.to_frame(['Product']).columns[:2]) == ['Product', 'Rating']
+
+    # Everything removed again
+    rows = _rows()
+    aggregator.add_rows(rows).remove_rows(rows)
+    assert aggregator.to_frame(['Product']).empty
+    assert score_probabilities(aggregator).empty
+
+
+def test_calendar_time_buckets():
+    rows = _rows()
+    weekly = SegmentAggregator(['Product'], 'W').add_rows(rows).to_frame()
+    assert set(weekly['Period']) == {pd.Timestamp('2025-12-29')}
+    monthly = SegmentAggregator(['Product'], 'M').add_rows(rows).to_frame()
+    assert set(monthly['Period']) == {pd.Timestamp('2026-01-01')}
+
+
+def test_invalid_time_bucket_is_rejected():
+    with pytest.raises(ValueError, match="Invalid time bucket"):
+        SegmentAggregator(['Product'], 'fortnight')
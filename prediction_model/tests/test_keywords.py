@@ -0,0 +1,50 @@
+import pandas as pd
+
+from keywords import MATCHER, TRIGGER_WORDS, KeywordMatcher
+
+
+def _old_find_terms(text):
+    # Substring matching used by nlp_engine.extract_keywords before the shared matcher
+    text = str(text).lower()
+    return [word for word in TRIGGER_WORDS if word in text]
+
+
+def test_matches_old_find_terms_on_whole_words():
+    for text in [
+        "The ATM network failed and the app is slow",
+        "Login error, then a timeout. Terrible!",
+        "Refund still not charged back; useless support",
+        "nothing to report"
+    ]:
+        assert MATCHER.find_terms(text, "trigger") == _old_find_terms(text)
+
+
+def test_word_boundaries_and_inflections():
+    # Substrings of other words no longer match ("down" in "download", "issue" in "tissues")
+    assert _old_find_terms("Download the tissues") == ["issue", "down"]
+    assert MATCHER.find_terms("Download the tissues", "trigger") == []
+    # Inflections of a term map to the term
+    assert MATCHER.find_terms("It crashed twice, still crashing", "trigger") == ["crash"]
+    assert MATCHER.find_terms("waiting for the delayed refunds", "trigger") == ["delay", "wait", "refund"]
+
+
+def test_case_and_multi_word_terms():
+    matcher = KeywordMatcher({"issues": ["Log In", "slow"], "praise": ["very fast"]})
+    assert matcher.find("Cannot LOG IN, and it is SLOW") == {"issues": ["log in", "slow"], "praise": []}
+    assert matcher.find("Very fast service") == {"issues": [], "praise": ["very fast"]}
+    # The words of a multi-word term must be adjacent
+    assert matcher.find_terms("log me in", "issues") == []
+
+
+def test_overlapping_lexicons_are_resolved_in_one_pass():
+    # "fail" (negative) and "failed" (trigger) both match the same word
+    found = MATCHER.find("Payment failed")
+    assert found["trigger"] == ["failed"]
+    assert found["negative"] == ["fail"]
+
+
+def test_find_series_matches_find_terms():
+    texts = pd.Series(["Slow LOGIN error", None, "", "crashed; crash", "all good"], index=[10, 11, 12, 13, 14])
+    result = MATCHER.find_series(texts, "trigger")
+    assert list(result.index) == [10, 11, 12, 13, 14]
+    assert result.tolist() == [MATCHER.find_terms(t, "trigger") for t in texts]
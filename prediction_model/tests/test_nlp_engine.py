@@ -0,0 +1,25 @@
+import pandas as pd
+
+from nlp_engine import ScoringPool, analyze_comments
+
+COMMENTS = ['card stuck again', 'great app', 'login error and slow', 'ok', 'Great app', None, 'terrible service']
+
+
+def test_pool_is_reused_across_calls_and_matches_serial():
+    serial = analyze_comments(pd.DataFrame({'Comment': COMMENTS}), batch_size=2)
+
+    with ScoringPool(2) as pool:
+        first = analyze_comments(pd.DataFrame({'Comment': COMMENTS}), batch_size=2, pool=pool)
+        executor = pool._executor
+        second = analyze_comments(pd.DataFrame({'Comment': COMMENTS[::-1]}), batch_size=2, pool=pool)
+        assert executor is not None and pool._executor is executor
+    assert pool._executor is None
+
+    pd.testing.assert_frame_equal(first, serial)
+    assert second['Sentiment Score'].tolist() == serial['Sentiment Score'].tolist()[::-1]
+
+
+def test_single_worker_pool_is_never_started():
+    with ScoringPool(1) as pool:
+        analyze_comments(pd.DataFrame({'Comment': COMMENTS}), batch_size=2, pool=pool)
+        assert pool._executor is None
@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("watchdog")
+
+import ingest_state
+import realtime_monitor
+
+
+@pytest.fixture
+def workbook(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest_state, "STATE_DIR", str(tmp_path / "state"))
+    # Results only; the workbook is not written back
+    monkeypatch.setattr(realtime_monitor, "export_to_excel", lambda df, path: None)
+    monkeypatch.setattr(realtime_monitor, "write_result_sinks", lambda df, source=None: {})
+
+    path = str(tmp_path / "feedback.xlsx")
+    # Header layout of the bundled template ('Feedback Type' is the product)
+    pd.DataFrame({
+        'Date': ['4/25/2025', '4/26/2025', '4/26/2025', '4/27/2025'],
+        'Customer': ['Customer 1', 'Customer 2', 'Customer 3', 'Customer 4'],
+        'Feedback Type': ['ATM', 'ATM', 'App', 'App'],
+        'Rating (1–5)': [2, 3, 5, 4],
+        'Status': ['Open', 'Open', 'Resolved', 'Resolved'],
+        'Comments': ['card stuck', 'slow', 'great app', 'works fine']
+    }).to_excel(path, sheet_name='Feedback_Data', index=False)
+    return path
+
+
+def test_aggregates_survive_a_restart(workbook):
+    first = realtime_monitor.ExcelFileHandler(workbook)
+    first.run_model()
+    totals = first.state.aggregator.to_frame()
+
+    # A new session starts from the saved state: nothing is rescored
+    restarted = realtime_monitor.ExcelFileHandler(workbook)
+    assert restarted.state.watermark.rows == 4
+    restarted.run_model()
+    assert restarted.scored is None
+    pd.testing.assert_frame_equal(
+        restarted.state.aggregator.to_frame(), totals, check_dtype=False, check_categorical=False
+    )
+
+
+def test_rows_of_a_failed_run_are_read_again(workbook, monkeypatch):
+    analyze_comments = realtime_monitor.analyze_comments
+
+    def fail(df, *args, **kwargs):
+        raise RuntimeError("scoring failed")
+
+    handler = realtime_monitor.ExcelFileHandler(workbook)
+    monkeypatch.setattr(realtime_monitor, "analyze_comments", fail)
+    handler.run_model()
+    assert handler.state.watermark.rows == 0
+    assert ingest_state.IngestState.load(workbook).watermark.rows == 0
+
+    # The next change event scores the same rows again
+    monkeypatch.setattr(realtime_monitor, "analyze_comments", analyze_comments)
+    handler.run_model()
+    assert handler.state.watermark.rows == 4
+    assert handler.state.aggregator.to_frame()['Rating Count'].sum() == 4
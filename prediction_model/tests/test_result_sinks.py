@@ -0,0 +1,95 @@
+import json
+import sqlite3
+
+import pandas as pd
+
+import result_sinks
+from result_sinks import (
+    SINK_COLUMNS, JsonSnapshotSink, ParquetSink, SQLiteSink, parse_sink_names, sink_frame, write_result_sinks
+)
+
+RUN_TS = "2026-01-01T09:00:00"
+
+
+def _results():
+    return pd.DataFrame({
+        'Feedback Type': pd.Categorical(['ATM', 'App']),
+        'Average Rating': [2.0, 4.5],
+        'Average Sentiment Score': [0.91, 0.12],
+        'Risk Level': pd.Categorical(['Critical', 'Stable']),
+        'Top Issue Summary': ['card, stuck', None],
+        'Recommendation': ['Escalate', 'Monitor situation.'],
+        'Probability Score': [0.87, 0.1],
+        'Posterior Mean': [0.8, 0.15],
+        'Credible Lower': [0.6, 0.05],
+        'Credible Upper': [0.93, 0.3]
+    })
+
+
+def test_sink_frame_schema():
+    frame = sink_frame(_results(), RUN_TS, ['a.xlsm', 'b.xlsm'])
+    assert list(frame.columns) == SINK_COLUMNS
+    assert frame['source_workbook'].tolist() == ['a.xlsm', 'b.xlsm']
+    assert frame['product'].isna().all()
+    assert frame['risk_level'].tolist() == ['Critical', 'Stable']
+    assert frame['posterior_mean'].tolist() == [0.8, 0.15]
+    assert frame['credible_upper'].dtype == 'float64'
+
+
+def test_each_sink_round_trips(tmp_path):
+    sinks = [ParquetSink(tmp_path / "parquet"), SQLiteSink(str(tmp_path / "results.db")), JsonSnapshotSink(tmp_path)]
+    written = write_result_sinks(_results(), sinks, table="output", run_ts=RUN_TS, source="book.xlsm")
+    assert len(written) == 3
+
+    parquet = pd.read_parquet(tmp_path / "parquet" / "output")
+    assert parquet['feedback_type'].astype(str).tolist() == ['ATM', 'App']
+    assert parquet['average_rating'].tolist() == [2.0, 4.5]
+    assert parquet['run_date'].astype(str).unique().tolist() == ['2026-01-01']
+
+    with sqlite3.connect(tmp_path / "results.db") as conn:
+        rows = conn.execute(
+            "SELECT run_ts, source_workbook, feedback_type, risk_level, probability_score, credible_lower FROM output"
+        ).fetchall()
+    assert rows == [(RUN_TS, 'book.xlsm', 'ATM', 'Critical', 0.87, 0.6), (RUN_TS, 'book.xlsm', 'App', 'Stable', 0.1, 0.05)]
+
+    with open(tmp_path / "output_latest.json") as f:
+        snapshot = json.load(f)
+    assert snapshot['run_ts'] == RUN_TS
+    assert [r['feedback_type'] for r in snapshot['results']] == ['ATM', 'App']
+    assert snapshot['results'][1]['top_issue_summary'] is None
+    assert snapshot['results'][0]['posterior_mean'] == 0.8
+
+
+def test_runs_append_except_json(tmp_path):
+    sinks = [ParquetSink(tmp_path / "parquet"), SQLiteSink(str(tmp_path / "results.db")), JsonSnapshotSink(tmp_path)]
+    write_result_sinks(_results(), sinks, run_ts=RUN_TS)
+    write_result_sinks(_results().iloc[:1], sinks, run_ts="2026-01-02T09:00:00")
+
+    assert len(pd.read_parquet(tmp_path / "parquet" / "output")) == 3
+    with sqlite3.connect(tmp_path / "results.db") as conn:
+        assert conn.execute("SELECT COUNT(*) FROM output").fetchone() == (3,)
+    with open(tmp_path / "output_latest.json") as f:
+        assert len(json.load(f)['results']) == 1
+
+
+def test_sqlite_table_from_before_new_columns_is_extended(tmp_path):
+    with sqlite3.connect(tmp_path / "results.db") as conn:
+        conn.execute("CREATE TABLE output (run_ts TEXT NOT NULL, feedback_type TEXT, probability_score REAL)")
+        conn.execute("INSERT INTO output VALUES ('2025-12-31T09:00:00', 'ATM', 0.5)")
+
+    SQLiteSink(str(tmp_path / "results.db")).write(sink_frame(_results(), RUN_TS), "output")
+    with sqlite3.connect(tmp_path / "results.db") as conn:
+        rows = conn.execute("SELECT run_ts, posterior_mean FROM output ORDER BY run_ts").fetchall()
+    assert rows == [('2025-12-31T09:00:00', None), (RUN_TS, 0.8), (RUN_TS, 0.15)]
+
+
+def test_sink_names_are_case_insensitive(monkeypatch, tmp_path):
+    assert parse_sink_names(" Parquet,SQLITE, ,json") == ["parquet", "sqlite", "json"]
+
+    monkeypatch.setitem(result_sinks.RESULT_SINKS, "json", lambda: JsonSnapshotSink(tmp_path))
+    assert list(write_result_sinks(_results(), ["JSON"], run_ts=RUN_TS)) == ["json"]
+
+
+def test_failing_sink_is_skipped(tmp_path):
+    written = write_result_sinks(_results(), ["nosuchsink", JsonSnapshotSink(tmp_path)], run_ts=RUN_TS)
+    assert list(written) == ["JsonSnapshotSink"]
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from bayesian_model import SegmentAggregator
+from risk_engine import classify_risk
+from schema import apply_schema
+
+
+def _scored_rows(rating, score, n=3):
+    return apply_schema(pd.DataFrame({
+        'Date': pd.date_range('2026-01-01', periods=n, freq='D'),
+        'Product': ['App'] * n,
+        'Rating': [rating] * n,
+        'Sentiment Score': [score] * n,
+        'Keywords': [''] * n
+    }))
+
+
+def test_float32_score_at_threshold_is_not_critical():
+    rows = _scored_rows(3.0, 0.8)
+    assert rows['Sentiment Score'].dtype == np.float32
+    assert float(rows['Sentiment Score'].iloc[0]) > 0.8  # storage noise
+
+    # Record level and aggregated: exactly 0.8 is not "> 0.8"
+    assert classify_risk(rows).tolist() == ['Warning'] * 3
+    products = SegmentAggregator().add_rows(rows).to_frame()
+    products = products.rename(columns={'Rating': 'Average Rating', 'Sentiment Score': 'Average Sentiment Score'})
+    assert abs(products['Average Sentiment Score'].iloc[0] - 0.8) < 1e-9
+    assert classify_risk(products).tolist() == ['Warning']
+
+
+def test_float32_score_at_warning_threshold_is_stable():
+    assert classify_risk(_scored_rows(4.5, 0.4)).tolist() == ['Stable'] * 3
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from schema import TEXT_DTYPE, apply_schema, memory_report, widen
+
+
+def _raw():
+    return pd.DataFrame({
+        'Date': ['2026-01-01', 'not a date', None],
+        'Product': ['ATM', 'App', 'ATM'],
+        'Rating': ['4', 3.5, 'n/a'],
+        'Comment': ['slow', None, 'card stuck'],
+        'Status': [1, 'Open', None],
+        'Customer': ['a', 'b', 'c']
+    })
+
+
+def test_apply_schema_casts_known_columns():
+    df = apply_schema(_raw())
+
+    assert pd.api.types.is_datetime64_any_dtype(df['Date'])
+    assert isinstance(df['Product'].dtype, pd.CategoricalDtype)
+    assert df['Rating'].dtype == np.float32
+    assert df['Comment'].dtype == TEXT_DTYPE
+    # Columns outside the schema are left alone
+    assert df['Customer'].dtype == _raw()['Customer'].dtype
+
+
+def test_unparseable_values_become_missing():
+    df = apply_schema(_raw())
+
+    assert df['Date'].isna().tolist() == [False, True, True]
+    assert df['Rating'].tolist()[:2] == [4.0, 3.5]
+    assert np.isnan(df['Rating'].iloc[2])
+    assert df['Comment'].isna().tolist() == [False, True, False]
+
+
+def test_numeric_labels_become_text_categories():
+    df = apply_schema(_raw())
+    assert list(df['Status'].cat.categories) == ['1', 'Open']
+    assert df['Status'].isna().tolist() == [False, False, True]
+
+
+def test_apply_schema_is_idempotent():
+    once = apply_schema(_raw())
+    pd.testing.assert_frame_equal(apply_schema(once.copy()), once)
+
+
+def test_widen_rounds_float32_noise():
+    stored = pd.Series([0.8, 0.4, None], dtype=np.float32)
+    assert float(stored.iloc[0]) != 0.8
+
+    widened = widen(stored)
+    assert widened.dtype == np.float64
+    assert widened[:2].tolist() == [0.8, 0.4]
+    assert np.isnan(widened[2])
+
+
+def test_memory_report_totals():
+    df = apply_schema(_raw())
+    report = memory_report(df)
+    assert report.loc['Total', 'bytes'] == df.memory_usage(deep=True, index=False).sum()
+    assert set(report.index) == set(df.columns) | {'Total'}
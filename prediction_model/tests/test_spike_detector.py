@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from spike_detector import MIN_RECORDS, PageHinkley, SpikeDetector, attach_alerts
+
+
+def _bimodal(rng, n, negative_share):
+    # Sentiment scores cluster near 0 and 1
+    negative = rng.random(n) < negative_share
+    return np.where(negative, rng.uniform(0.9, 1.0, n), rng.uniform(0.0, 0.1, n))
+
+
+def test_no_alert_on_stable_bimodal_stream():
+    rng = np.random.default_rng(7)
+    test = PageHinkley()
+    assert not any(test.update(v) for v in _bimodal(rng, 1000, 0.3))
+
+
+def test_alert_on_shift_and_recovery():
+    rng = np.random.default_rng(7)
+    test = PageHinkley()
+    for v in _bimodal(rng, 300, 0.2):
+        test.update(v)
+    assert not test.alert
+
+    alerts = [test.update(v) for v in _bimodal(rng, 100, 0.8)]
+    assert any(alerts)
+    # Raised within a few dozen records of the shift
+    assert alerts.index(True) < 60
+
+    for v in _bimodal(rng, 2000, 0.2):
+        test.update(v)
+    assert not test.alert
+
+
+def test_no_alert_during_baseline():
+    test = PageHinkley()
+    assert not any(test.update(v) for v in [0.0] * 5 + [1.0] * (MIN_RECORDS - 5))
+    assert test.cumulative == 0.0
+
+
+def test_detector_state_round_trip():
+    rng = np.random.default_rng(3)
+    rows = pd.DataFrame({
+        'Date': pd.date_range('2026-01-01', periods=400, freq='h'),
+        'Product': ['ATM'] * 400,
+        'Sentiment Score': np.concatenate([_bimodal(rng, 300, 0.1), _bimodal(rng, 100, 0.9)])
+    })
+    detector = SpikeDetector().update_frame(rows)
+    assert detector.tests['ATM'].alert
+
+    restored = SpikeDetector.from_state(json.loads(json.dumps(detector.to_state(), default=str)))
+    pd.testing.assert_frame_equal(restored.to_frame(), detector.to_frame())
+
+    products = attach_alerts(pd.DataFrame({'Feedback Type': ['ATM', 'App']}), restored)
+    assert products['Spike Alert'].tolist() == [True, False]